@@ -15,7 +15,7 @@ from dataclasses import dataclass, asdict
 from ai.chat import ask_kobold
 from ai.memory import get_user_memory
 
-@dataclass
+@dataclass(slots=True)
 class ExtractionResult:
     """Complete extraction result from single LLM call"""
     memory_events: List[Dict[str, Any]]
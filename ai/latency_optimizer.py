@@ -7,24 +7,55 @@ Purpose: Integrate all optimization components to reduce LLM response latency
 
 import time
 import json
+import importlib
+import importlib.util
 from typing import Dict, List, Any, Optional, Tuple, Generator
 from datetime import datetime
 from enum import Enum
 
-# Import optimization components
-try:
-    from ai.optimized_prompt_builder import (
-        build_optimized_prompt, 
-        PromptOptimizationLevel, 
-        ConsciousnessTier,
-        get_optimization_performance_stats
-    )
-    from ai.lazy_consciousness_loader import get_optimized_consciousness
-    from ai.symbolic_token_optimizer import compress_consciousness_to_tokens
-    OPTIMIZATION_AVAILABLE = True
-except ImportError as e:
-    print(f"[LatencyOptimizer] ❌ Optimization modules not available: {e}")
-    OPTIMIZATION_AVAILABLE = False
+# Optimization components are imported on first use (PEP 562 module __getattr__)
+# so DISABLED/fallback-only use of this module never pays for loading them.
+_OPTIMIZATION_MODULES = (
+    'ai.optimized_prompt_builder',
+    'ai.lazy_consciousness_loader',
+    'ai.symbolic_token_optimizer'
+)
+_LAZY_OPTIMIZATION_ATTRS = {
+    'build_optimized_prompt': 'ai.optimized_prompt_builder',
+    'PromptOptimizationLevel': 'ai.optimized_prompt_builder',
+    'ConsciousnessTier': 'ai.optimized_prompt_builder',
+    'get_optimization_performance_stats': 'ai.optimized_prompt_builder',
+    'get_optimized_consciousness': 'ai.lazy_consciousness_loader',
+    'compress_consciousness_to_tokens': 'ai.symbolic_token_optimizer'
+}
+
+OPTIMIZATION_AVAILABLE = all(importlib.util.find_spec(name) is not None for name in _OPTIMIZATION_MODULES)
+if not OPTIMIZATION_AVAILABLE:
+    print("[LatencyOptimizer] ❌ Optimization modules not available")
+
+def __getattr__(name: str):
+    """Lazily resolve optimization component attributes on first access"""
+    module_name = _LAZY_OPTIMIZATION_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+_prompt_builder = None
+
+def _get_prompt_builder():
+    """Import the optimization modules on first use (None if they fail to import)"""
+    global _prompt_builder, OPTIMIZATION_AVAILABLE
+    if _prompt_builder is None and OPTIMIZATION_AVAILABLE:
+        try:
+            modules = [importlib.import_module(name) for name in _OPTIMIZATION_MODULES]
+            _prompt_builder = modules[0]
+        except ImportError as e:
+            # find_spec only saw that the modules exist - one of them failed to load
+            print(f"[LatencyOptimizer] ❌ Optimization modules not available: {e}")
+            OPTIMIZATION_AVAILABLE = False
+    return _prompt_builder
 
 # Import LLM components
 try:
@@ -38,6 +69,25 @@ except ImportError:
         FUSION_LLM_AVAILABLE = False
         print("[LatencyOptimizer] ❌ No LLM modules available")
 
+# Estimated consciousness preservation per tier (keyed by ConsciousnessTier value)
+_CONSCIOUSNESS_TIER_SCORES = {
+    'minimal': 0.4,
+    'standard': 0.7,
+    'comprehensive': 0.9,
+    'debug': 1.0
+}
+
+# Ultimate fallback responses; only the selected template is formatted
+_FALLBACK_TEMPLATES = (
+    "I hear you saying: {user_input}. I'm having some technical difficulties but I'm here to help.",
+    "I understand you said '{user_input}'. Let me try to help you with that.",
+    "Thanks for your message: '{user_input}'. I'm experiencing some system issues but I'm working on it."
+)
+_FALLBACK_GREETING = "Hello! I'm experiencing some technical difficulties but I'm glad you're here."
+
+# Shared empty response iterable for failed LLM calls (a tuple can be iterated repeatedly)
+_EMPTY_RESPONSE = ()
+
 class LatencyOptimizationMode(Enum):
     """Latency optimization modes with different performance/intelligence trade-offs"""
     ULTRA_FAST = "ultra_fast"      # <2 seconds, minimal consciousness
@@ -52,8 +102,18 @@ class LatencyOptimizer:
     to achieve sub-5-second LLM response times while maintaining consciousness
     """
     
+    __slots__ = (
+        'optimization_mode',
+        '_mode_value',
+        'performance_history',
+        'optimization_stats',
+        '_mode_configs',
+        '_response_impl'
+    )
+    
     def __init__(self, default_mode: LatencyOptimizationMode = LatencyOptimizationMode.FAST):
         self.optimization_mode = default_mode
+        self._mode_value = default_mode.value  # Cached so hot paths skip the enum lookup
         self.performance_history = []
         self.optimization_stats = {
             'total_requests': 0,
@@ -62,8 +122,34 @@ class LatencyOptimizer:
             'consciousness_preservation_rate': 0.0
         }
         
-        # Optimization mode configurations
-        self.mode_configs = {
+        # Optimization mode configurations (built on first access)
+        self._mode_configs = None
+        
+        # Response generator specialized for the current mode
+        self._response_impl = self._select_response_impl(default_mode)
+        
+    @property
+    def mode_configs(self) -> Dict[LatencyOptimizationMode, Dict[str, Any]]:
+        """Optimization mode configurations, built on first access"""
+        if self._mode_configs is None:
+            self._mode_configs = self._build_mode_configs()
+        return self._mode_configs
+    
+    def _build_mode_configs(self) -> Dict[LatencyOptimizationMode, Dict[str, Any]]:
+        """Build mode configurations (imports the prompt builder enums)"""
+        prompt_builder = _get_prompt_builder()
+        if prompt_builder is None:
+            return {
+                LatencyOptimizationMode.DISABLED: {
+                    'use_original_system': True,
+                    'target_time': None
+                }
+            }
+        
+        PromptOptimizationLevel = prompt_builder.PromptOptimizationLevel
+        ConsciousnessTier = prompt_builder.ConsciousnessTier
+        
+        return {
             LatencyOptimizationMode.ULTRA_FAST: {
                 'prompt_optimization': PromptOptimizationLevel.SPEED_FOCUSED,
                 'consciousness_tier': ConsciousnessTier.MINIMAL,
@@ -102,6 +188,12 @@ class LatencyOptimizer:
             }
         }
         
+    def _select_response_impl(self, mode: LatencyOptimizationMode):
+        """Pick the response generator for a mode (DISABLED goes straight to fallback)"""
+        if not OPTIMIZATION_AVAILABLE or mode == LatencyOptimizationMode.DISABLED:
+            return self._generate_fallback_response
+        return self._generate_optimized_response_impl
+    
     def generate_optimized_response(self,
                                   user_input: str,
                                   user_id: str,
@@ -119,23 +211,32 @@ class LatencyOptimizer:
         Yields:
             Response chunks or complete response
         """
+        return self._response_impl(user_input, user_id, context, stream)
+    
+    def _generate_optimized_response_impl(self,
+                                        user_input: str,
+                                        user_id: str,
+                                        context: Dict[str, Any],
+                                        stream: bool) -> Generator[str, None, None]:
+        """Optimized response generation used by every mode except DISABLED"""
+        prompt_builder = _get_prompt_builder()
+        if prompt_builder is None:
+            # Optimization modules failed to import - use the original system from now on
+            self._response_impl = self._generate_fallback_response
+            yield from self._generate_fallback_response(user_input, user_id, context, stream)
+            return
+        
         request_start = time.time()
         
         try:
-            # Check if optimization is available and enabled
-            if not OPTIMIZATION_AVAILABLE or self.optimization_mode == LatencyOptimizationMode.DISABLED:
-                # Fall back to original system
-                yield from self._generate_fallback_response(user_input, user_id, context, stream)
-                return
-            
             config = self.mode_configs[self.optimization_mode]
             
-            print(f"[LatencyOptimizer] 🚀 Starting {self.optimization_mode.value} optimization")
+            print(f"[LatencyOptimizer] 🚀 Starting {self._mode_value} optimization")
             print(f"[LatencyOptimizer] 🎯 Target response time: {config['target_time']}s")
             
             # Phase 1: Fast prompt building (target: <200ms)
             prompt_start = time.time()
-            optimized_prompt, build_metadata = build_optimized_prompt(
+            optimized_prompt, build_metadata = prompt_builder.build_optimized_prompt(
                 user_input=user_input,
                 user_id=user_id,
                 optimization_level=config['prompt_optimization'],
@@ -164,20 +265,19 @@ class LatencyOptimizer:
                 response_generator = generate_response_streaming(optimized_prompt, user_id, "en")
             
             # Phase 3: Stream response with performance monitoring
-            full_response = ""
+            response_parts = []
             chunk_count = 0
             first_chunk_time = None
             
             for chunk in response_generator:
-                if chunk and chunk.strip():
-                    chunk_text = chunk.strip()
-                    
+                chunk_text = chunk.strip() if chunk else ""
+                if chunk_text:
                     # Record first chunk time (time to first token)
                     if first_chunk_time is None:
                         first_chunk_time = time.time() - generation_start
                         print(f"[LatencyOptimizer] 🎯 First token in {first_chunk_time:.3f}s")
                     
-                    full_response += chunk_text + " "
+                    response_parts.append(chunk_text)
                     chunk_count += 1
                     
                     if stream:
@@ -198,7 +298,7 @@ class LatencyOptimizer:
             
             # If not streaming, yield complete response
             if not stream:
-                yield full_response.strip()
+                yield " ".join(response_parts)
             
             print(f"[LatencyOptimizer] ✅ Response completed in {total_time:.3f}s")
             print(f"[LatencyOptimizer] 📊 Performance: {'✅ Target met' if total_time <= config['target_time'] else '⚠️ Target missed'}")
@@ -264,47 +364,43 @@ Buddy:"""
                 return generate_response_streaming(prompt, user_id, "en")
         except Exception as e:
             print(f"[LatencyOptimizer] ⚠️ Basic LLM failed: {e}")
-            return iter([])  # Return empty iterator
+            return _EMPTY_RESPONSE  # Empty, never yields
     
     def _get_ultimate_fallback_response(self, user_input: str) -> str:
         """Get ultimate fallback response when all else fails"""
-        responses = [
-            f"I hear you saying: {user_input}. I'm having some technical difficulties but I'm here to help.",
-            f"I understand you said '{user_input}'. Let me try to help you with that.",
-            f"Thanks for your message: '{user_input}'. I'm experiencing some system issues but I'm working on it.",
-            "I'm experiencing some technical difficulties right now, but I'm still here to assist you.",
-            "I'm having some system issues at the moment, but I appreciate your patience."
-        ]
-        
         # Choose response based on input length
         if len(user_input) > 50:
-            return responses[0]
-        elif any(word in user_input.lower() for word in ['how', 'what', 'why', 'when', 'where']):
-            return responses[1]
-        elif any(word in user_input.lower() for word in ['hello', 'hi', 'hey']):
-            return "Hello! I'm experiencing some technical difficulties but I'm glad you're here."
+            template = _FALLBACK_TEMPLATES[0]
         else:
-            return responses[2]
+            lowered = user_input.lower()
+            if any(word in lowered for word in ('how', 'what', 'why', 'when', 'where')):
+                template = _FALLBACK_TEMPLATES[1]
+            elif any(word in lowered for word in ('hello', 'hi', 'hey')):
+                return _FALLBACK_GREETING
+            else:
+                template = _FALLBACK_TEMPLATES[2]
+        return template.format(user_input=user_input)
     
     def _record_performance(self,
                           total_time: float,
                           prompt_time: float,
                           first_token_time: float,
                           target_time: float,
-                          consciousness_tier: ConsciousnessTier,
+                          consciousness_tier: 'ConsciousnessTier',
                           build_metadata: Dict[str, Any],
                           success: bool):
         """Record performance metrics for optimization analysis"""
         try:
             performance_record = {
                 'timestamp': datetime.now().isoformat(),
-                'optimization_mode': self.optimization_mode.value,
+                'optimization_mode': self._mode_value,
                 'total_time': total_time,
                 'prompt_build_time': prompt_time,
                 'first_token_time': first_token_time,
                 'target_time': target_time,
                 'target_met': success,
                 'consciousness_tier': consciousness_tier.value,
+                'consciousness_score': _CONSCIOUSNESS_TIER_SCORES.get(consciousness_tier.value, 0.5),
                 'token_usage': build_metadata.get('token_usage', {}),
                 'consciousness_stats': build_metadata.get('consciousness_stats', {}),
                 'optimization_level': build_metadata.get('optimization_level', 'unknown')
@@ -324,14 +420,7 @@ Buddy:"""
             self.optimization_stats['optimization_success_rate'] = sum(recent_successes) / len(recent_successes)
             
             # Estimate consciousness preservation (based on tier used)
-            consciousness_scores = {
-                'minimal': 0.4,
-                'standard': 0.7,
-                'comprehensive': 0.9,
-                'debug': 1.0
-            }
-            recent_consciousness = [consciousness_scores.get(r['consciousness_tier'], 0.5) 
-                                  for r in self.performance_history[-50:]]
+            recent_consciousness = [r['consciousness_score'] for r in self.performance_history[-50:]]
             self.optimization_stats['consciousness_preservation_rate'] = sum(recent_consciousness) / len(recent_consciousness)
             
             print(f"[LatencyOptimizer] 📈 Performance recorded: {total_time:.3f}s ({'✅' if success else '❌'})")
@@ -342,7 +431,9 @@ Buddy:"""
     def set_optimization_mode(self, mode: LatencyOptimizationMode):
         """Change optimization mode dynamically"""
         self.optimization_mode = mode
-        print(f"[LatencyOptimizer] 🎯 Optimization mode changed to: {mode.value}")
+        self._mode_value = mode.value
+        self._response_impl = self._select_response_impl(mode)
+        print(f"[LatencyOptimizer] 🎯 Optimization mode changed to: {self._mode_value}")
         
         if mode in self.mode_configs:
             config = self.mode_configs[mode]
@@ -360,28 +451,41 @@ Buddy:"""
             
             recent_requests = self.performance_history[-20:]  # Last 20 requests
             
-            # Calculate detailed statistics
-            response_times = [r['total_time'] for r in recent_requests]
-            prompt_times = [r['prompt_build_time'] for r in recent_requests]
-            first_token_times = [r['first_token_time'] for r in recent_requests]
-            success_rate = sum(r['target_met'] for r in recent_requests) / len(recent_requests)
+            # Calculate detailed statistics in a single pass
+            request_count = len(recent_requests)
+            total_response_time = total_prompt_time = total_first_token_time = 0.0
+            fastest_response = float('inf')
+            slowest_response = 0.0
+            successes = stable_requests = 0
+            for r in recent_requests:
+                response_time = r['total_time']
+                total_response_time += response_time
+                if response_time < fastest_response:
+                    fastest_response = response_time
+                if response_time > slowest_response:
+                    slowest_response = response_time
+                total_prompt_time += r['prompt_build_time']
+                total_first_token_time += r['first_token_time']
+                successes += r['target_met']
+                stable_requests += response_time < 10
+            success_rate = successes / request_count
             
             report = {
-                'current_mode': self.optimization_mode.value,
+                'current_mode': self._mode_value,
                 'target_time': self.mode_configs[self.optimization_mode].get('target_time', 'unlimited'),
                 'performance_summary': {
-                    'average_response_time': sum(response_times) / len(response_times),
-                    'fastest_response': min(response_times),
-                    'slowest_response': max(response_times),
-                    'average_prompt_build_time': sum(prompt_times) / len(prompt_times),
-                    'average_first_token_time': sum(first_token_times) / len(first_token_times),
+                    'average_response_time': total_response_time / request_count,
+                    'fastest_response': fastest_response,
+                    'slowest_response': slowest_response,
+                    'average_prompt_build_time': total_prompt_time / request_count,
+                    'average_first_token_time': total_first_token_time / request_count,
                     'target_success_rate': success_rate,
-                    'total_requests_analyzed': len(recent_requests)
+                    'total_requests_analyzed': request_count
                 },
                 'optimization_effectiveness': {
                     'latency_reduction_achieved': success_rate > 0.8,
                     'consciousness_preservation': self.optimization_stats['consciousness_preservation_rate'],
-                    'optimization_stability': len([r for r in recent_requests if r['total_time'] < 10]) / len(recent_requests)
+                    'optimization_stability': stable_requests / request_count
                 },
                 'recommendations': self._generate_optimization_recommendations(recent_requests),
                 'detailed_stats': self.optimization_stats
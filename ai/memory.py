@@ -2,6 +2,7 @@
 import time
 import json
 import datetime
+import functools
 import re
 from pathlib import Path
 from typing import Dict, List, Any, Optional, Tuple
@@ -335,6 +336,179 @@ class MemoryInferenceEngine:
         
         return contradictions
 
+# Extraction stamps facts with second-resolution UTC strings - format each second once
+_utc_stamp_cache = (None, None, None)
+
+def _utc_now_strings() -> Tuple[str, str]:
+    """Return ('%Y-%m-%d', '%Y-%m-%d %H:%M:%S') for the current UTC second"""
+    global _utc_stamp_cache
+    second = int(time.time())
+    cached_second, today, now = _utc_stamp_cache
+    if cached_second != second:
+        now = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(second))
+        today = now[:10]
+        _utc_stamp_cache = (second, today, now)
+    return today, now
+
+# 🧠 Extraction pattern tables - compiled once at import instead of per call
+def _compile_pattern_table(rows):
+    """Compile the regex in the first column of each pattern row"""
+    return tuple((re.compile(row[0]),) + tuple(row[1:]) for row in rows)
+
+_DEATH_PATTERNS = _compile_pattern_table([
+    (r"my (\w+) (died|passed away|passed|is dead|has died)", "death", "{0}", EmotionalImpact.CRITICAL.value),
+    (r"(\w+) died", "death", "{0}", EmotionalImpact.CRITICAL.value),
+    (r"(\w+) passed away", "death", "{0}", EmotionalImpact.CRITICAL.value),
+    (r"lost my (\w+)", "loss", "{0}", EmotionalImpact.HIGH.value),
+    (r"put (\w+) down", "euthanasia", "{0}", EmotionalImpact.CRITICAL.value),
+    (r"had to say goodbye to (\w+)", "death", "{0}", EmotionalImpact.CRITICAL.value),
+    (r"(\w+) is no longer with us", "death", "{0}", EmotionalImpact.CRITICAL.value),
+])
+
+_RELATIONSHIP_PATTERNS = _compile_pattern_table([
+    (r"my (ex|former) (\w+)", "relationship_end", "{1}", EntityStatus.ENDED),
+    (r"broke up with (\w+)", "breakup", "{0}", EntityStatus.ENDED),
+    (r"divorced (\w+)", "divorce", "{0}", EntityStatus.ENDED),
+    (r"separated from (\w+)", "separation", "{0}", EntityStatus.ENDED),
+])
+
+_PERSONAL_FACT_PATTERNS = _compile_pattern_table([
+    # Physical attributes
+    (r"my shoe size is (\d+)", "physical", "shoe_size", EntityStatus.CURRENT),
+    (r"i'm (\d+) years old", "physical", "age", EntityStatus.CURRENT),
+    
+    # Preferences with entity awareness
+    (r"i love my (\w+)", "preferences", "loves_{0}", EntityStatus.CURRENT),
+    (r"i hate (\w+)", "preferences", "dislikes_{0}", EntityStatus.CURRENT),
+    (r"i used to love (\w+)", "preferences", "formerly_loved_{0}", EntityStatus.FORMER),
+    
+    # Possessions with status
+    (r"i have a (\w+)", "possessions", "owns_{0}", EntityStatus.CURRENT),
+    (r"i used to have a (\w+)", "possessions", "formerly_owned_{0}", EntityStatus.FORMER),
+    (r"i sold my (\w+)", "possessions", "sold_{0}", EntityStatus.SOLD),
+    
+    # Medical with ongoing status
+    (r"i'm allergic to (\w+)", "medical", "allergy_{0}", EntityStatus.CURRENT),
+    (r"i have (\w+) condition", "medical", "condition_{0}", EntityStatus.CURRENT),
+    
+    # CRITICAL FIX: Place visits and activities - SPECIFIC PATTERNS FIRST WITH COMPANIONS
+    # Patterns with companions (who they went with)
+    (r"went to mcdonalds? with (\w+)", "activities", "visited_mcdonalds_with_{0}", EntityStatus.CURRENT),
+    (r"went to mcdonald'?s? with (\w+)", "activities", "visited_mcdonalds_with_{0}", EntityStatus.CURRENT),
+    (r"been to mcdonalds? with (\w+)", "activities", "been_to_mcdonalds_with_{0}", EntityStatus.CURRENT),
+    (r"been to mcdonald'?s? with (\w+)", "activities", "been_to_mcdonalds_with_{0}", EntityStatus.CURRENT),
+    (r"(\w+ to \w+) with (\w+)", "activities", "{0}_with_{1}", EntityStatus.CURRENT),
+    # Special patterns for common places MUST come first to match before generic patterns
+    (r"went to mcdonalds", "activities", "visited_mcdonalds", EntityStatus.CURRENT),
+    (r"went to mcdonald's", "activities", "visited_mcdonalds", EntityStatus.CURRENT), 
+    (r"went to mcdonald", "activities", "visited_mcdonalds", EntityStatus.CURRENT),
+    (r"been to mcdonalds", "activities", "visited_mcdonalds", EntityStatus.CURRENT),
+    (r"been to mcdonald's", "activities", "visited_mcdonalds", EntityStatus.CURRENT),
+    (r"been to mcdonald", "activities", "visited_mcdonalds", EntityStatus.CURRENT),
+    # Generic patterns after specific ones
+    (r"i went to (\w+)", "activities", "visited_{0}", EntityStatus.CURRENT),
+    (r"went to (\w+)", "activities", "visited_{0}", EntityStatus.CURRENT),
+    (r"i was at (\w+)", "activities", "was_at_{0}", EntityStatus.CURRENT),
+    (r"visited (\w+)", "activities", "visited_{0}", EntityStatus.CURRENT),
+    (r"been to (\w+)", "activities", "been_to_{0}", EntityStatus.CURRENT),
+    (r"ate at (\w+)", "activities", "ate_at_{0}", EntityStatus.CURRENT),
+    (r"had (\w+) at (\w+)", "activities", "had_{0}_at_{1}", EntityStatus.CURRENT),
+])
+
+_EMOTION_PATTERNS = _compile_pattern_table([
+    (r"i'm (sad|depressed|down|upset) about (\w+)", "sad", 7, "{1}"),
+    (r"i'm (happy|excited|thrilled) about (\w+)", "happy", 8, "{1}"),
+    (r"missing (\w+)", "sad", 6, "{0}"),
+    (r"grieving (\w+)", "sad", 8, "{0}"),
+    (r"i miss (\w+)", "sad", 7, "{0}"),
+])
+
+_EVENT_PATTERNS = _compile_pattern_table([
+    (r"(?:it's|its) my (\w+)'s birthday tomorrow", "birthday", "{0}'s birthday", 1, ["{0}"]),
+    (r"(\w+)'s funeral is tomorrow", "funeral", "{0}'s funeral", 1, ["{0}"]),
+    (r"visiting (\w+) tomorrow", "visit", "visiting {0}", 1, ["{0}"]),
+])
+
+# 🎯 Plan detection tables - first matching row wins within each table
+# Plan patterns for today and immediate future
+_TODAY_PLAN_PATTERNS = _compile_pattern_table([
+    # Today specific plans (high priority)
+    (r"i'm going to (?:my\s+)?(.+?)\s+(?:birthday party|party)\s+today", "going to {0} birthday party"),
+    (r"i'm going to (.+?)\s+today", "going to {0}"),
+    (r"today i'm (.+?)(?:\.|$)", "i'm {0}"),
+    (r"i have (?:a\s+)?(.+?)\s+today", "have {0}"),
+    (r"i'm (?:having|attending) (?:a\s+)?(.+?)\s+today", "attending {0}"),
+    (r"my (.+?)\s+(?:birthday|party) is today", "my {0} birthday"),
+    
+    # General plans without time indicator (considered for today)
+    (r"i'm going to (?:my\s+)?(.+?)\s+(?:birthday party|party)(?:\.|$)", "going to {0} birthday party"),
+    (r"i'll be at (?:the\s+)?(.+?)(?:\.|$)", "will be at {0}"),
+    (r"i have plans? to (.+?)(?:\.|$)", "plan to {0}"),
+    (r"planning to (.+?)(?:\.|$)", "planning to {0}"),
+])
+
+# Tomorrow plans (separate category, not considered "today")
+_TOMORROW_PLAN_PATTERNS = _compile_pattern_table([
+    (r"tomorrow i'm going to (.+?)(?:\.|$)", "going to {0} tomorrow"),
+    (r"i'm going to (.+?)\s+tomorrow", "going to {0} tomorrow"),
+])
+
+# Family events and celebrations
+_FAMILY_EVENT_PLAN_PATTERNS = _compile_pattern_table([
+    (r"(?:i'm going to|going to) (?:my\s+)?(.+?)\s+(?:birthday|celebration|party)", "{0} celebration"),
+    (r"it's (?:my\s+)?(.+?)'s birthday", "{0}'s birthday"),
+    (r"celebrating (?:my\s+)?(.+?)'s (.+?)(?:\.|$)", "{0}'s {1}"),
+])
+
+# Entity-type hints (plain substring match), each set scanned in one pass
+_PET_INDICATORS = ("cat", "dog", "pet", "puppy", "kitten", "bird", "fish", "hamster")
+_PERSON_INDICATORS = ("mom", "dad", "mother", "father", "friend", "sister", "brother", "grandmother", "grandfather")
+_PET_INDICATOR_RE = re.compile('|'.join(map(re.escape, _PET_INDICATORS)))
+_PERSON_INDICATOR_RE = re.compile('|'.join(map(re.escape, _PERSON_INDICATORS)))
+
+# A single scan with the fused alternation rules out a whole table when no row can match
+def _pattern_table_probe(rows):
+    """Fuse a table's patterns into one regex that matches iff any row matches"""
+    return re.compile('|'.join(f'(?:{row[0].pattern})' for row in rows))
+
+_DEATH_PROBE = _pattern_table_probe(_DEATH_PATTERNS)
+_RELATIONSHIP_PROBE = _pattern_table_probe(_RELATIONSHIP_PATTERNS)
+_PERSONAL_FACT_PROBE = _pattern_table_probe(_PERSONAL_FACT_PATTERNS)
+_EMOTION_PROBE = _pattern_table_probe(_EMOTION_PATTERNS)
+_EVENT_PROBE = _pattern_table_probe(_EVENT_PATTERNS)
+
+# Literals at least one of which every row of the table requires - a plain substring
+# check rejects most utterances before any regex runs
+_PATTERN_TABLES = {
+    'death': (_DEATH_PATTERNS, _DEATH_PROBE,
+              ('died', 'passed', 'dead', 'lost my', 'down', 'goodbye', 'no longer')),
+    'relationship': (_RELATIONSHIP_PATTERNS, _RELATIONSHIP_PROBE,
+                     ('my ex', 'my former', 'broke up', 'divorced', 'separated')),
+    'personal_facts': (_PERSONAL_FACT_PATTERNS, _PERSONAL_FACT_PROBE,
+                       ('shoe size', 'years old', 'i love my', 'i hate', 'i have', 'i sold my',
+                        ' to ', ' at ', 'visited')),
+    'emotion': (_EMOTION_PATTERNS, _EMOTION_PROBE, ("i'm", 'miss', 'grieving')),
+    'events': (_EVENT_PATTERNS, _EVENT_PROBE, ('tomorrow',)),
+}
+
+@functools.lru_cache(maxsize=512)
+def _match_pattern_table(table: str, text_lower: str) -> Optional[Tuple[Optional[Tuple[str, ...]], ...]]:
+    """Match text against a pattern table (memoized - utterances are often re-processed)
+    
+    Returns None when no row matches, otherwise one entry per row: the captured
+    groups, or None if that row did not match.
+    """
+    rows, probe, keywords = _PATTERN_TABLES[table]
+    if not any(keyword in text_lower for keyword in keywords):
+        return None
+    if not probe.search(text_lower):
+        return None
+    row_groups = []
+    for row in rows:
+        match = row[0].search(text_lower)
+        row_groups.append(match.groups() if match else None)
+    return tuple(row_groups)
+
 class UserMemorySystem:
     """🧠 MEGA-INTELLIGENT: Enhanced memory system with context awareness"""
     
@@ -379,7 +553,7 @@ class UserMemorySystem:
     def add_entity_memory(self, name: str, entity_type: str, status: EntityStatus, 
                          emotional_significance: float, context: str):
         """🧠 Add or update entity memory with full context"""
-        current_time = datetime.datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+        _, current_time = _utc_now_strings()
         
         entity = EntityMemory(
             name=name,
@@ -478,16 +652,17 @@ class UserMemorySystem:
         current_time = datetime.datetime.now()
         
         for thread in reversed(self.interaction_log):  # Search from most recent
+            # Cheap field checks first - only candidates pay for timestamp parsing
+            if thread.intent != intent_type or thread.status != status:
+                continue
+            
             try:
                 thread_time = datetime.datetime.strptime(thread.timestamp, '%Y-%m-%d %H:%M:%S')
-                age_minutes = (current_time - thread_time).total_seconds() / 60
-                
-                if (thread.intent == intent_type and 
-                    thread.status == status and 
-                    age_minutes <= max_age_minutes):
-                    return thread
             except ValueError:
                 continue  # Skip if timestamp parsing fails
+            
+            if (current_time - thread_time).total_seconds() / 60 <= max_age_minutes:
+                return thread
         
         return None
     
@@ -619,7 +794,7 @@ class UserMemorySystem:
     def add_life_event(self, event_type: str, description: str, entities_involved: List[str],
                       emotional_impact: float, ongoing_effects: List[str] = None):
         """🧠 Record major life events with context"""
-        current_time = datetime.datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+        _, current_time = _utc_now_strings()
         
         if ongoing_effects is None:
             ongoing_effects = []
@@ -1186,20 +1361,13 @@ class UserMemorySystem:
     
     def _extract_death_and_loss_events(self, text_lower: str, original_text: str):
         """🧠 CRITICAL: Extract death and loss events with high emotional significance"""
-        death_patterns = [
-            (r"my (\w+) (died|passed away|passed|is dead|has died)", "death", "{0}", EmotionalImpact.CRITICAL.value),
-            (r"(\w+) died", "death", "{0}", EmotionalImpact.CRITICAL.value),
-            (r"(\w+) passed away", "death", "{0}", EmotionalImpact.CRITICAL.value),
-            (r"lost my (\w+)", "loss", "{0}", EmotionalImpact.HIGH.value),
-            (r"put (\w+) down", "euthanasia", "{0}", EmotionalImpact.CRITICAL.value),
-            (r"had to say goodbye to (\w+)", "death", "{0}", EmotionalImpact.CRITICAL.value),
-            (r"(\w+) is no longer with us", "death", "{0}", EmotionalImpact.CRITICAL.value),
-        ]
+        row_groups = _match_pattern_table('death', text_lower)
+        if row_groups is None:
+            return
         
-        for pattern, event_type, name_template, emotional_impact in death_patterns:
-            match = re.search(pattern, text_lower)
-            if match:
-                entity_name = name_template.format(match.group(1))
+        for (pattern, event_type, name_template, emotional_impact), groups in zip(_DEATH_PATTERNS, row_groups):
+            if groups is not None:
+                entity_name = name_template.format(groups[0])
                 
                 # Determine entity type
                 entity_type = self._determine_entity_type(entity_name, original_text)
@@ -1228,29 +1396,22 @@ class UserMemorySystem:
         """Determine entity type from context"""
         context_lower = context.lower()
         
-        pet_indicators = ["cat", "dog", "pet", "puppy", "kitten", "bird", "fish", "hamster"]
-        person_indicators = ["mom", "dad", "mother", "father", "friend", "sister", "brother", "grandmother", "grandfather"]
-        
-        if any(indicator in context_lower for indicator in pet_indicators):
+        if _PET_INDICATOR_RE.search(context_lower):
             return "pet"
-        elif any(indicator in context_lower for indicator in person_indicators):
+        elif _PERSON_INDICATOR_RE.search(context_lower):
             return "person"
         else:
             return "unknown"
     
     def _extract_relationship_changes(self, text_lower: str, original_text: str):
         """Extract relationship status changes"""
-        relationship_patterns = [
-            (r"my (ex|former) (\w+)", "relationship_end", "{1}", EntityStatus.ENDED),
-            (r"broke up with (\w+)", "breakup", "{0}", EntityStatus.ENDED),
-            (r"divorced (\w+)", "divorce", "{0}", EntityStatus.ENDED),
-            (r"separated from (\w+)", "separation", "{0}", EntityStatus.ENDED),
-        ]
+        row_groups = _match_pattern_table('relationship', text_lower)
+        if row_groups is None:
+            return
         
-        for pattern, event_type, name_template, status in relationship_patterns:
-            match = re.search(pattern, text_lower)
-            if match:
-                entity_name = name_template.format(*match.groups())
+        for (pattern, event_type, name_template, status), groups in zip(_RELATIONSHIP_PATTERNS, row_groups):
+            if groups is not None:
+                entity_name = name_template.format(*groups)
                 
                 self.add_entity_memory(
                     name=entity_name,
@@ -1264,76 +1425,37 @@ class UserMemorySystem:
     
     def _extract_enhanced_personal_facts(self, text_lower: str, original_text: str):
         """Enhanced personal fact extraction with entity awareness"""
-        enhanced_patterns = [
-            # Physical attributes
-            (r"my shoe size is (\d+)", "physical", "shoe_size", EntityStatus.CURRENT),
-            (r"i'm (\d+) years old", "physical", "age", EntityStatus.CURRENT),
-            
-            # Preferences with entity awareness
-            (r"i love my (\w+)", "preferences", "loves_{0}", EntityStatus.CURRENT),
-            (r"i hate (\w+)", "preferences", "dislikes_{0}", EntityStatus.CURRENT),
-            (r"i used to love (\w+)", "preferences", "formerly_loved_{0}", EntityStatus.FORMER),
-            
-            # Possessions with status
-            (r"i have a (\w+)", "possessions", "owns_{0}", EntityStatus.CURRENT),
-            (r"i used to have a (\w+)", "possessions", "formerly_owned_{0}", EntityStatus.FORMER),
-            (r"i sold my (\w+)", "possessions", "sold_{0}", EntityStatus.SOLD),
-            
-            # Medical with ongoing status
-            (r"i'm allergic to (\w+)", "medical", "allergy_{0}", EntityStatus.CURRENT),
-            (r"i have (\w+) condition", "medical", "condition_{0}", EntityStatus.CURRENT),
-            
-            # CRITICAL FIX: Place visits and activities - SPECIFIC PATTERNS FIRST WITH COMPANIONS
-            # Patterns with companions (who they went with)
-            (r"went to mcdonalds? with (\w+)", "activities", "visited_mcdonalds_with_{0}", EntityStatus.CURRENT),
-            (r"went to mcdonald'?s? with (\w+)", "activities", "visited_mcdonalds_with_{0}", EntityStatus.CURRENT),
-            (r"been to mcdonalds? with (\w+)", "activities", "been_to_mcdonalds_with_{0}", EntityStatus.CURRENT),
-            (r"been to mcdonald'?s? with (\w+)", "activities", "been_to_mcdonalds_with_{0}", EntityStatus.CURRENT),
-            (r"(\w+ to \w+) with (\w+)", "activities", "{0}_with_{1}", EntityStatus.CURRENT),
-            # Special patterns for common places MUST come first to match before generic patterns
-            (r"went to mcdonalds", "activities", "visited_mcdonalds", EntityStatus.CURRENT),
-            (r"went to mcdonald's", "activities", "visited_mcdonalds", EntityStatus.CURRENT), 
-            (r"went to mcdonald", "activities", "visited_mcdonalds", EntityStatus.CURRENT),
-            (r"been to mcdonalds", "activities", "visited_mcdonalds", EntityStatus.CURRENT),
-            (r"been to mcdonald's", "activities", "visited_mcdonalds", EntityStatus.CURRENT),
-            (r"been to mcdonald", "activities", "visited_mcdonalds", EntityStatus.CURRENT),
-            # Generic patterns after specific ones
-            (r"i went to (\w+)", "activities", "visited_{0}", EntityStatus.CURRENT),
-            (r"went to (\w+)", "activities", "visited_{0}", EntityStatus.CURRENT),
-            (r"i was at (\w+)", "activities", "was_at_{0}", EntityStatus.CURRENT),
-            (r"visited (\w+)", "activities", "visited_{0}", EntityStatus.CURRENT),
-            (r"been to (\w+)", "activities", "been_to_{0}", EntityStatus.CURRENT),
-            (r"ate at (\w+)", "activities", "ate_at_{0}", EntityStatus.CURRENT),
-            (r"had (\w+) at (\w+)", "activities", "had_{0}_at_{1}", EntityStatus.CURRENT),
-        ]
-        
-        for pattern, category, key_template, status in enhanced_patterns:
-            match = re.search(pattern, text_lower)
-            if match:
-                key = key_template.format(*match.groups()) if "{0}" in key_template else key_template
+        row_groups = _match_pattern_table('personal_facts', text_lower)
+        if row_groups is None:
+            return
+        
+        for (pattern, category, key_template, status), groups in zip(_PERSONAL_FACT_PATTERNS, row_groups):
+            if groups is not None:
+                key = key_template.format(*groups) if "{0}" in key_template else key_template
                 
                 # CRITICAL FIX: Handle specific patterns vs generic patterns for value
-                if "mcdonalds" in key_template and not match.groups():
+                if "mcdonalds" in key_template and not groups:
                     value = "mcdonalds"  # Fixed value for McDonald's patterns without capture groups
                 elif "mcdonalds_with_" in key_template:
-                    value = f"mcdonalds with {match.group(1)}"  # McDonald's with companion
-                elif match.groups():
-                    if len(match.groups()) == 1:
-                        value = match.group(1)  # Single capture group
-                    elif len(match.groups()) == 2:
-                        value = f"{match.group(1)} with {match.group(2)}"  # Activity with companion
+                    value = f"mcdonalds with {groups[0]}"  # McDonald's with companion
+                elif groups:
+                    if len(groups) == 1:
+                        value = groups[0]  # Single capture group
+                    elif len(groups) == 2:
+                        value = f"{groups[0]} with {groups[1]}"  # Activity with companion
                     else:
-                        value = " ".join(match.groups())  # Multiple capture groups
+                        value = " ".join(groups)  # Multiple capture groups
                 else:
                     value = "activity"  # Fallback for patterns without capture groups
                 
+                _, current_time = _utc_now_strings()
                 fact = PersonalFact(
                     category=category,
                     key=key,
                     value=value,
                     confidence=0.8,
-                    date_learned=datetime.datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'),
-                    last_mentioned=datetime.datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'),
+                    date_learned=current_time,
+                    last_mentioned=current_time,
                     source_context=original_text,
                     current_status=status
                 )
@@ -1342,24 +1464,19 @@ class UserMemorySystem:
     
     def _extract_enhanced_emotional_states(self, text_lower: str, original_text: str):
         """Enhanced emotional state extraction with entity connections"""
-        emotion_patterns = [
-            (r"i'm (sad|depressed|down|upset) about (\w+)", "sad", 7, "{1}"),
-            (r"i'm (happy|excited|thrilled) about (\w+)", "happy", 8, "{1}"),
-            (r"missing (\w+)", "sad", 6, "{0}"),
-            (r"grieving (\w+)", "sad", 8, "{0}"),
-            (r"i miss (\w+)", "sad", 7, "{0}"),
-        ]
+        row_groups = _match_pattern_table('emotion', text_lower)
+        if row_groups is None:
+            return
         
-        for pattern, emotion, intensity, entity_template in emotion_patterns:
-            match = re.search(pattern, text_lower)
-            if match:
-                trigger_entity = entity_template.format(*match.groups()) if entity_template else None
+        for (pattern, emotion, intensity, entity_template), groups in zip(_EMOTION_PATTERNS, row_groups):
+            if groups is not None:
+                trigger_entity = entity_template.format(*groups) if entity_template else None
                 
                 state = EmotionalState(
                     emotion=emotion,
                     intensity=intensity,
                     context=original_text,
-                    date=datetime.datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'),
+                    date=_utc_now_strings()[1],
                     follow_up_needed=True,
                     trigger_entities=[trigger_entity] if trigger_entity else []
                 )
@@ -1369,17 +1486,14 @@ class UserMemorySystem:
     
     def _extract_enhanced_events(self, text_lower: str, original_text: str):
         """Enhanced event extraction with entity connections"""
-        event_patterns = [
-            (r"(?:it's|its) my (\w+)'s birthday tomorrow", "birthday", "{0}'s birthday", 1, ["{0}"]),
-            (r"(\w+)'s funeral is tomorrow", "funeral", "{0}'s funeral", 1, ["{0}"]),
-            (r"visiting (\w+) tomorrow", "visit", "visiting {0}", 1, ["{0}"]),
-        ]
+        row_groups = _match_pattern_table('events', text_lower)
+        if row_groups is None:
+            return
         
-        for pattern, event_type, desc_template, days_ahead, entities_template in event_patterns:
-            match = re.search(pattern, text_lower)
-            if match:
-                description = desc_template.format(*match.groups())
-                entities = [template.format(*match.groups()) for template in entities_template]
+        for (pattern, event_type, desc_template, days_ahead, entities_template), groups in zip(_EVENT_PATTERNS, row_groups):
+            if groups is not None:
+                description = desc_template.format(*groups)
+                entities = [template.format(*groups) for template in entities_template]
                 
                 event_date = (datetime.datetime.utcnow() + 
                             datetime.timedelta(days=days_ahead)).strftime('%Y-%m-%d')
@@ -1398,37 +1512,13 @@ class UserMemorySystem:
     def _detect_user_plan_for_today(self, text_lower: str, original_text: str):
         """🎯 PLAN DETECTION: Extract user plans for today/immediate future"""
         try:
-            today = datetime.datetime.utcnow().strftime('%Y-%m-%d')
-            current_time = datetime.datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
-            
-            # Plan patterns for today and immediate future
-            plan_patterns = [
-                # Today specific plans (high priority)
-                (r"i'm going to (?:my\s+)?(.+?)\s+(?:birthday party|party)\s+today", "going to {0} birthday party"),
-                (r"i'm going to (.+?)\s+today", "going to {0}"),
-                (r"today i'm (.+?)(?:\.|$)", "i'm {0}"),
-                (r"i have (?:a\s+)?(.+?)\s+today", "have {0}"),
-                (r"i'm (?:having|attending) (?:a\s+)?(.+?)\s+today", "attending {0}"),
-                (r"my (.+?)\s+(?:birthday|party) is today", "my {0} birthday"),
-                
-                # General plans without time indicator (considered for today)
-                (r"i'm going to (?:my\s+)?(.+?)\s+(?:birthday party|party)(?:\.|$)", "going to {0} birthday party"),
-                (r"i'll be at (?:the\s+)?(.+?)(?:\.|$)", "will be at {0}"),
-                (r"i have plans? to (.+?)(?:\.|$)", "plan to {0}"),
-                (r"planning to (.+?)(?:\.|$)", "planning to {0}"),
-            ]
-            
-            # Tomorrow plans (separate category, not considered "today")
-            tomorrow_patterns = [
-                (r"tomorrow i'm going to (.+?)(?:\.|$)", "going to {0} tomorrow"),
-                (r"i'm going to (.+?)\s+tomorrow", "going to {0} tomorrow"),
-            ]
+            today, current_time = _utc_now_strings()
             
             plan_detected = False
             
             # First check for today plans
-            for pattern, plan_template in plan_patterns:
-                match = re.search(pattern, text_lower)
+            for pattern, plan_template in _TODAY_PLAN_PATTERNS:
+                match = pattern.search(text_lower)
                 if match:
                     plan_description = plan_template.format(match.group(1).strip())
                     
@@ -1443,8 +1533,8 @@ class UserMemorySystem:
             
             # Check for tomorrow plans (do not store as today's plan)
             if not plan_detected:
-                for pattern, plan_template in tomorrow_patterns:
-                    match = re.search(pattern, text_lower)
+                for pattern, plan_template in _TOMORROW_PLAN_PATTERNS:
+                    match = pattern.search(text_lower)
                     if match:
                         plan_description = plan_template.format(match.group(1).strip())
                         print(f"[MegaMemory] 📅 Tomorrow plan noted: {plan_description}")
@@ -1454,14 +1544,8 @@ class UserMemorySystem:
                     
             # Special handling for family events and celebrations
             if not plan_detected:
-                family_event_patterns = [
-                    (r"(?:i'm going to|going to) (?:my\s+)?(.+?)\s+(?:birthday|celebration|party)", "{0} celebration"),
-                    (r"it's (?:my\s+)?(.+?)'s birthday", "{0}'s birthday"),
-                    (r"celebrating (?:my\s+)?(.+?)'s (.+?)(?:\.|$)", "{0}'s {1}"),
-                ]
-                
-                for pattern, plan_template in family_event_patterns:
-                    match = re.search(pattern, text_lower)
+                for pattern, plan_template in _FAMILY_EVENT_PLAN_PATTERNS:
+                    match = pattern.search(text_lower)
                     if match:
                         groups = match.groups()
                         if len(groups) == 1:
@@ -1529,7 +1613,7 @@ class UserMemorySystem:
         """🧠 MULTI-CONTEXT: Update working memory with multiple simultaneous contexts"""
         try:
             text_lower = text.lower().strip()
-            current_time = datetime.datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+            _, current_time = _utc_now_strings()
             
             # 🎯 STEP 1: Parse for multiple events in compound statements
             contexts = self._parse_multi_context_statement(text_lower, original_text)
@@ -2111,7 +2195,7 @@ class UserMemorySystem:
         """🧠 Track multi-turn task intentions"""
         try:
             text_lower = text.lower().strip()
-            current_time = datetime.datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+            _, current_time = _utc_now_strings()
             
             # Intent linking patterns
             prep_patterns = [
@@ -2582,7 +2666,7 @@ class UserMemorySystem:
     # Keep existing methods for compatibility
     def add_conversation_topic(self, topic: str, keywords: List[str]):
         """Add or update a conversation topic"""
-        current_time = datetime.datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+        _, current_time = _utc_now_strings()
         
         existing_topic = None
         for t in self.conversation_topics:
@@ -2619,7 +2703,7 @@ class UserMemorySystem:
                          confidence: float, context: str):
         """Add or update a personal fact"""
         fact_id = f"{category}_{key}"
-        current_time = datetime.datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+        _, current_time = _utc_now_strings()
         
         fact = PersonalFact(
             category=category,
@@ -2638,7 +2722,7 @@ class UserMemorySystem:
     def add_emotional_state(self, emotion: str, intensity: int, 
                            context: str, follow_up: bool = True):
         """Record user's emotional state"""
-        current_time = datetime.datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+        _, current_time = _utc_now_strings()
         
         state = EmotionalState(
             emotion=emotion,
@@ -2676,7 +2760,7 @@ class UserMemorySystem:
     
     def get_today_reminders(self) -> List[str]:
         """Get reminders for today"""
-        today = datetime.datetime.utcnow().strftime('%Y-%m-%d')
+        today, _ = _utc_now_strings()
         reminders = []
         
         for event in self.scheduled_events:
@@ -2693,7 +2777,7 @@ class UserMemorySystem:
     def get_follow_up_questions(self) -> List[str]:
         """Get questions to follow up on previous conversations"""
         questions = []
-        today = datetime.datetime.utcnow().strftime('%Y-%m-%d')
+        today, _ = _utc_now_strings()
         yesterday = (datetime.datetime.utcnow() - datetime.timedelta(days=1)).strftime('%Y-%m-%d')
         
         # Check emotional follow-ups from yesterday
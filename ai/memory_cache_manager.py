@@ -12,16 +12,206 @@ Key Features:
 """
 
 import json
+import re
 import threading
+import queue
 import time
 import hashlib
-from datetime import datetime, timedelta
+import functools
+import itertools
+import heapq
+import random
+from datetime import datetime
 from typing import Dict, List, Any, Optional, Tuple, Set
 from dataclasses import dataclass, asdict
-from collections import defaultdict, OrderedDict
+from collections import defaultdict
 from concurrent.futures import ThreadPoolExecutor, Future
 import os
+import sys
 import pickle
+import struct
+import math
+import zlib
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import zstandard
+    _zstd_compressor = zstandard.ZstdCompressor(level=3)
+    _zstd_decompressor = zstandard.ZstdDecompressor()
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+# Values estimated above this size are stored compressed when that saves space
+_COMPRESSION_THRESHOLD_BYTES = 4096
+_COMPRESSION_MIN_SAVING = 0.9  # Keep compressed form only if <= 90% of pickled size
+
+# Persistence records: 1-byte tag + 4-byte big-endian length + payload
+_RECORD_JSON = b'J'
+_RECORD_PICKLE = b'P'
+_RECORD_HEADER = struct.Struct('>cI')
+
+# Per-operation logging (hits, writes, evictions, batches) is off unless enabled
+MEMORY_CACHE_DEBUG = os.getenv('BUDDY_MEMORY_CACHE_DEBUG', 'false').lower() == 'true'
+
+# Entries not accessed for this long are expired by background maintenance
+_CACHE_ENTRY_TTL_NS = 3600 * 1_000_000_000  # 1 hour
+
+# Bounds for structural size estimation of cached values
+_SIZE_ESTIMATE_MAX_DEPTH = 3
+_SIZE_ESTIMATE_MAX_ITEMS = 64
+
+def _is_json_safe(obj: Any, depth: int = 0) -> bool:
+    """Check whether a value survives a JSON round trip unchanged"""
+    if obj is None or isinstance(obj, (str, bool)):
+        return True
+    if type(obj) is int:
+        return -(1 << 63) <= obj < (1 << 64)
+    if type(obj) is float:
+        return math.isfinite(obj)
+    if depth > 32:
+        return False
+    if type(obj) is list:
+        return all(_is_json_safe(item, depth + 1) for item in obj)
+    if type(obj) is dict:
+        return all(type(key) is str and _is_json_safe(value, depth + 1)
+                   for key, value in obj.items())
+    return False
+
+def _json_dumps(obj: Any) -> bytes:
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+def _json_loads(payload: bytes) -> Any:
+    if ORJSON_AVAILABLE:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+def _estimate_size(obj: Any, depth: int = 0) -> int:
+    """Cheaply estimate the in-memory size of a cached value in bytes
+    
+    Walks containers up to a bounded depth and element count, extrapolating
+    from the sampled elements, instead of serializing the whole object graph.
+    """
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        return len(obj)
+    
+    size = sys.getsizeof(obj)
+    if depth >= _SIZE_ESTIMATE_MAX_DEPTH or isinstance(obj, (str, int, float, bool)) or obj is None:
+        return size
+    
+    if isinstance(obj, dict):
+        items = obj.items()
+        count = len(obj)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        items = obj
+        count = len(obj)
+    elif hasattr(obj, '__dict__'):
+        items = vars(obj).items()
+        count = len(items)
+    else:
+        return size
+    
+    if count == 0:
+        return size
+    
+    sampled = 0
+    children_size = 0
+    for item in items:
+        if sampled >= _SIZE_ESTIMATE_MAX_ITEMS:
+            break
+        if isinstance(item, tuple) and items is not obj:
+            # (key, value) pair from a mapping
+            children_size += _estimate_size(item[0], depth + 1) + _estimate_size(item[1], depth + 1)
+        else:
+            children_size += _estimate_size(item, depth + 1)
+        sampled += 1
+    
+    # Extrapolate from the sampled elements for large containers
+    return size + children_size * count // sampled
+
+@functools.lru_cache(maxsize=1024)
+def _query_hash(query: str) -> str:
+    """Short stable hash of a query (memoized for repeated queries)"""
+    return hashlib.blake2b(query.lower().encode(), digest_size=4).hexdigest()
+
+# Suggestions look back over this many recent accesses per context
+_SUGGESTION_WINDOW = 10
+_HEX_RUN_PATTERN = re.compile(r'[0-9a-f]{8,}')
+
+@functools.lru_cache(maxsize=4096)
+def _embedded_query_hashes(cache_key: str) -> Tuple[str, ...]:
+    """All 8-char hex substrings of a key that a query hash could match"""
+    hashes = set()
+    for run in _HEX_RUN_PATTERN.findall(cache_key):
+        for start in range(len(run) - 7):
+            hashes.add(run[start:start + 8])
+    return tuple(hashes)
+
+class _CompressedValue:
+    """Compressed pickled cache value, decompressed on read"""
+    
+    __slots__ = ('payload', 'codec')
+    
+    def __init__(self, payload: bytes, codec: str):
+        self.payload = payload
+        self.codec = codec
+    
+    @classmethod
+    def compress(cls, data: Any) -> Tuple[Optional['_CompressedValue'], int]:
+        """Compress a value; returns (wrapper or None if not worthwhile, pickled size)"""
+        try:
+            pickled = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return None, 0
+        
+        if ZSTD_AVAILABLE:
+            payload, codec = _zstd_compressor.compress(pickled), 'zstd'
+        else:
+            payload, codec = zlib.compress(pickled, 3), 'zlib'
+        
+        if len(payload) > len(pickled) * _COMPRESSION_MIN_SAVING:
+            return None, len(pickled)
+        return cls(payload, codec), len(pickled)
+    
+    def load(self) -> Any:
+        """Decompress and unpickle the original value"""
+        if self.codec == 'zstd':
+            pickled = _zstd_decompressor.decompress(self.payload)
+        else:
+            pickled = zlib.decompress(self.payload)
+        return pickle.loads(pickled)
+
+class _AtomicCounter:
+    """Thread-safe counter; increments are a single next() on an itertools.count"""
+    __slots__ = ('_ticks', '_offset', '_lock')
+    
+    def __init__(self):
+        self._ticks = itertools.count()
+        self._offset = 0  # Bulk additions minus ticks consumed by reads
+        self._lock = threading.Lock()
+    
+    def increment(self):
+        next(self._ticks)
+    
+    def add(self, amount: int):
+        with self._lock:
+            self._offset += amount
+    
+    @property
+    def value(self) -> int:
+        with self._lock:
+            # Reading consumes one tick, which the offset compensates for
+            value = next(self._ticks) + self._offset
+            self._offset -= 1
+            return value
+
 
 class SerializableLock:
     """Thread-safe lock that can be safely serialized/pickled"""
@@ -49,19 +239,113 @@ class SerializableLock:
         # Recreate the lock when unpickling
         self._lock = threading.RLock()
 
-@dataclass
+class _CacheShard:
+    """One independently locked segment of the memory cache"""
+    
+    __slots__ = ('entries', 'lock', 'size_bytes', 'expiry_heap', 'keys', 'positions')
+    
+    def __init__(self):
+        # Recency lives in CacheEntry.last_accessed, so no ordering is maintained
+        self.entries: Dict[str, 'CacheEntry'] = {}
+        self.lock = SerializableLock()
+        self.size_bytes = 0
+        # Dense key array + key -> index map so eviction can sample in O(k)
+        self.keys: List[str] = []
+        self.positions: Dict[str, int] = {}
+        # Min-heap of (last_accessed, key); hits don't push, so items are
+        # revalidated lazily against the entry when they reach the top
+        self.expiry_heap: List[Tuple[int, str]] = []
+    
+    def insert(self, entry: 'CacheEntry'):
+        """Store a new entry (caller holds self.lock and removed any previous one)"""
+        key = entry.cache_key
+        self.entries[key] = entry
+        self.positions[key] = len(self.keys)
+        self.keys.append(key)
+        self.size_bytes += entry.size_bytes
+        self.push_expiry(entry)
+    
+    def remove(self, key: str) -> Optional['CacheEntry']:
+        """Remove and return an entry (caller holds self.lock)"""
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return None
+        
+        # Swap-remove from the dense key array
+        index = self.positions.pop(key)
+        last_key = self.keys.pop()
+        if last_key != key:
+            self.keys[index] = last_key
+            self.positions[last_key] = index
+        
+        self.size_bytes -= entry.size_bytes
+        return entry
+    
+    def remove_many(self, keys: List[str]) -> int:
+        """Remove several entries with a single size update (caller holds self.lock)"""
+        entries, positions, dense_keys = self.entries, self.positions, self.keys
+        removed_bytes = 0
+        removed = 0
+        
+        for key in keys:
+            entry = entries.pop(key, None)
+            if entry is None:
+                continue
+            index = positions.pop(key)
+            last_key = dense_keys.pop()
+            if last_key != key:
+                dense_keys[index] = last_key
+                positions[last_key] = index
+            removed_bytes += entry.size_bytes
+            removed += 1
+        
+        self.size_bytes -= removed_bytes
+        return removed
+    
+    def sample_keys(self, count: int) -> List[str]:
+        """Pick up to count random keys (caller holds self.lock)"""
+        return random.sample(self.keys, min(count, len(self.keys)))
+    
+    def push_expiry(self, entry: 'CacheEntry'):
+        """Track an entry for expiry (caller holds self.lock)"""
+        heap = self.expiry_heap
+        if len(heap) > 2 * len(self.entries) + 64:
+            # Drop stale items left behind by evicted/replaced entries
+            heap[:] = [(e.last_accessed, key) for key, e in self.entries.items()]
+            heapq.heapify(heap)
+        heapq.heappush(heap, (entry.last_accessed, entry.cache_key))
+    
+    def pop_expired(self, cutoff: int) -> List['CacheEntry']:
+        """Remove entries last accessed before cutoff (caller holds self.lock)"""
+        heap = self.expiry_heap
+        expired = []
+        while heap and heap[0][0] < cutoff:
+            stamp, key = heapq.heappop(heap)
+            entry = self.entries.get(key)
+            if entry is None or entry.created_at > stamp:
+                continue  # Stale item from an evicted or replaced entry
+            if entry.last_accessed >= cutoff:
+                # Accessed since it was queued - requeue at its new position
+                heapq.heappush(heap, (entry.last_accessed, key))
+                continue
+            self.remove(key)
+            expired.append(entry)
+        return expired
+
+@dataclass(slots=True)
 class CacheEntry:
     """Cached memory entry with metadata"""
     data: Any
-    created_at: datetime
-    last_accessed: datetime
+    created_at: int  # time.monotonic_ns()
+    last_accessed: int  # time.monotonic_ns()
     access_count: int
     cache_key: str
     context_tags: Set[str]
     invalidation_triggers: Set[str]
     size_bytes: int
+    key_hash: int = 0  # hash(cache_key), computed once at insert; selects the shard
 
-@dataclass
+@dataclass(slots=True)
 class MemoryOperationBatch:
     """Batch of similar memory operations"""
     batch_id: str
@@ -82,40 +366,63 @@ class MemoryCacheManager:
     - Smart deduplication and compression
     """
     
-    def __init__(self, max_cache_size_mb: int = 100, cache_persistence: bool = True):
+    def __init__(self, max_cache_size_mb: int = 100, cache_persistence: bool = True,
+                 num_shards: int = 16, eviction_sample_size: int = 8):
         self.max_cache_size_mb = max_cache_size_mb
         self.max_cache_size_bytes = max_cache_size_mb * 1024 * 1024
         self.cache_persistence = cache_persistence
         
-        # Cache storage with LRU eviction
-        self.cache: OrderedDict[str, CacheEntry] = OrderedDict()
-        self.cache_size_bytes = 0
-        # Use a custom lock class that can be serialized safely
-        self.cache_lock = SerializableLock()
+        # Cache storage striped across independently locked shards with
+        # sampled-LRU eviction (oldest of eviction_sample_size random entries)
+        # (num_shards is rounded up to a power of two for mask-based selection)
+        shard_count = 1
+        while shard_count < max(1, num_shards):
+            shard_count <<= 1
+        self._shards = [_CacheShard() for _ in range(shard_count)]
+        self._shard_mask = shard_count - 1
+        self.shard_capacity_bytes = self.max_cache_size_bytes // shard_count
+        self.eviction_sample_size = max(1, eviction_sample_size)
+        self.debug = MEMORY_CACHE_DEBUG
         
-        # Operation batching
-        self.pending_batches: Dict[str, MemoryOperationBatch] = {}
+        # Operation batching (one open batch per (batch_type, user_context))
+        self.pending_batches: Dict[Tuple[str, str], MemoryOperationBatch] = {}
         self.batch_threshold = 3  # Minimum operations to form a batch
         self.batch_timeout = 2.0  # Maximum wait time for batching
         self.batch_lock = SerializableLock()
+        self._batch_sequence = itertools.count(1)  # Unique, collision-free batch ids
+        # Timeout flushes are handled by one scheduler thread instead of a Timer per batch
+        self._batch_schedule: queue.PriorityQueue = queue.PriorityQueue()
+        self._batch_scheduler_stop = threading.Event()
+        self._batch_scheduler_thread = threading.Thread(
+            target=self._run_batch_scheduler, daemon=True, name="MemoryBatchScheduler"
+        )
+        self._batch_scheduler_thread.start()
         
         # Context pattern learning
         self.access_patterns: Dict[str, List[str]] = defaultdict(list)  # user -> access sequence
+        # context -> embedded query hash -> [(sequence position of access, next access)]
+        self._next_access_index: Dict[str, Dict[str, List[Tuple[int, str]]]] = defaultdict(lambda: defaultdict(list))
+        self._access_counts: Dict[str, int] = defaultdict(int)  # context -> accesses recorded
         self.context_associations: Dict[str, Set[str]] = defaultdict(set)  # context -> related keys
         self.pattern_lock = threading.Lock()
         
-        # Pre-loading system
-        self.preload_queue: Set[str] = set()
+        # Pre-loading system (context pattern -> in-flight preload future)
+        self.preload_queue: Dict[str, Future] = {}
+        self.preload_lock = threading.Lock()
         self.preload_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="MemoryPreloader")
         
         # Performance metrics
         self.metrics = {
-            'cache_hits': 0,
-            'cache_misses': 0,
-            'batch_operations': 0,
-            'preload_successes': 0,
-            'invalidations': 0,
-            'evictions': 0
+            name: _AtomicCounter() for name in (
+                'cache_hits',
+                'cache_misses',
+                'batch_operations',
+                'preload_successes',
+                'invalidations',
+                'evictions',
+                'compressed_writes',
+                'compression_bytes_saved'
+            )
         }
         
         # Cache persistence
@@ -131,30 +438,59 @@ class MemoryCacheManager:
         print(f"[MemoryCacheManager] 📊 Max cache size: {max_cache_size_mb}MB")
         print(f"[MemoryCacheManager] 💾 Cache persistence: {'enabled' if cache_persistence else 'disabled'}")
     
-    def get_cached_memory(self, cache_key: str, context_tags: Set[str] = None) -> Optional[Any]:
-        """Get cached memory data with context awareness"""
-        with self.cache_lock:
-            if cache_key in self.cache:
-                entry = self.cache[cache_key]
-                
-                # Update access statistics
-                entry.last_accessed = datetime.now()
-                entry.access_count += 1
-                
-                # Move to end (most recently used)
-                self.cache.move_to_end(cache_key)
-                
-                # Record access pattern
-                self._record_access_pattern(cache_key, context_tags)
-                
-                self.metrics['cache_hits'] += 1
-                print(f"[MemoryCacheManager] 🎯 Cache hit: {cache_key[:20]}...")
-                return entry.data
-            else:
-                self.metrics['cache_misses'] += 1
-                # Trigger preloading for related content
-                self._trigger_contextual_preload(cache_key, context_tags)
-                return None
+    @property
+    def cache_size_bytes(self) -> int:
+        """Total bytes cached across all shards"""
+        return sum(shard.size_bytes for shard in self._shards)
+    
+    def _shard_for(self, cache_key: str) -> _CacheShard:
+        """Get the shard responsible for a cache key"""
+        return self._shards[hash(cache_key) & self._shard_mask]
+    
+    def _shard_for_hash(self, key_hash: int) -> _CacheShard:
+        """Get the shard for a precomputed key hash"""
+        return self._shards[key_hash & self._shard_mask]
+    
+    def _contains(self, cache_key: str) -> bool:
+        """Check whether a key is cached (without touching recency)"""
+        return cache_key in self._shard_for(cache_key).entries
+    
+    def _entry_count(self) -> int:
+        """Total number of cached entries across all shards"""
+        return sum(len(shard.entries) for shard in self._shards)
+    
+    def get_cached_memory(self, cache_key: str, context_tags: Set[str] = None,
+                          primary_context: str = None) -> Optional[Any]:
+        """Get cached memory data with context awareness
+        
+        primary_context names the context whose access pattern is recorded;
+        when omitted, an arbitrary tag from context_tags is used.
+        """
+        shard = self._shard_for(cache_key)
+        # Lock-free lookup; recency is tracked through last_accessed only
+        entry = shard.entries.get(cache_key)
+        
+        if entry is None:
+            self.metrics['cache_misses'].increment()
+            # Trigger preloading for related content
+            self._trigger_contextual_preload(cache_key, context_tags)
+            return None
+        
+        # Update access statistics
+        entry.last_accessed = time.monotonic_ns()
+        entry.access_count += 1
+        
+        # Record access pattern
+        self._record_access_pattern(cache_key, context_tags, primary_context)
+        
+        self.metrics['cache_hits'].increment()
+        if self.debug:
+            print(f"[MemoryCacheManager] 🎯 Cache hit: {cache_key[:20]}...")
+        
+        data = entry.data
+        if isinstance(data, _CompressedValue):
+            return data.load()
+        return data
     
     def cache_memory_data(self, cache_key: str, data: Any, context_tags: Set[str] = None, 
                          invalidation_triggers: Set[str] = None) -> bool:
@@ -164,102 +500,138 @@ class MemoryCacheManager:
         if invalidation_triggers is None:
             invalidation_triggers = set()
         
-        # Calculate data size
+        # Estimate data size structurally (avoids serializing the whole value)
         try:
-            data_size = len(pickle.dumps(data))
-        except:
+            data_size = _estimate_size(data)
+        except Exception:
             data_size = len(str(data).encode('utf-8'))
         
+        # Store large values compressed when it actually saves space
+        stored_data = data
+        if data_size > _COMPRESSION_THRESHOLD_BYTES:
+            compressed, pickled_size = _CompressedValue.compress(data)
+            if compressed is not None:
+                stored_data = compressed
+                self.metrics['compressed_writes'].increment()
+                self.metrics['compression_bytes_saved'].add(pickled_size - len(compressed.payload))
+                data_size = len(compressed.payload)
+        
+        if data_size > self.shard_capacity_bytes:
+            print(f"[MemoryCacheManager] ⚠️ Data too large to cache: {data_size} bytes")
+            return False
+        
         # Check if we need to make room
-        with self.cache_lock:
-            if data_size > self.max_cache_size_bytes:
-                print(f"[MemoryCacheManager] ⚠️ Data too large to cache: {data_size} bytes")
-                return False
+        key_hash = hash(cache_key)
+        shard = self._shard_for_hash(key_hash)
+        with shard.lock:
+            # Replacing an existing key releases its old size first
+            shard.remove(cache_key)
             
             # Evict entries if needed
-            while (self.cache_size_bytes + data_size > self.max_cache_size_bytes and 
-                   len(self.cache) > 0):
-                self._evict_lru_entry()
+            while (shard.size_bytes + data_size > self.shard_capacity_bytes and 
+                   shard.entries):
+                self._evict_lru_entry(shard)
             
             # Create cache entry
+            now = time.monotonic_ns()
             entry = CacheEntry(
-                data=data,
-                created_at=datetime.now(),
-                last_accessed=datetime.now(),
+                data=stored_data,
+                created_at=now,
+                last_accessed=now,
                 access_count=1,
                 cache_key=cache_key,
                 context_tags=context_tags,
                 invalidation_triggers=invalidation_triggers,
-                size_bytes=data_size
+                size_bytes=data_size,
+                key_hash=key_hash
             )
             
             # Store in cache
-            self.cache[cache_key] = entry
-            self.cache_size_bytes += data_size
+            shard.insert(entry)
             
             # Record context associations
             self._record_context_associations(cache_key, context_tags)
             
-            print(f"[MemoryCacheManager] 💾 Cached: {cache_key[:20]}... ({data_size} bytes)")
+            if self.debug:
+                print(f"[MemoryCacheManager] 💾 Cached: {cache_key[:20]}... ({data_size} bytes)")
             return True
     
     def invalidate_cache(self, invalidation_trigger: str):
         """Invalidate cache entries based on trigger"""
         invalidated_count = 0
         
-        with self.cache_lock:
-            keys_to_remove = []
-            
-            for cache_key, entry in self.cache.items():
-                if invalidation_trigger in entry.invalidation_triggers:
-                    keys_to_remove.append(cache_key)
-            
-            for key in keys_to_remove:
-                entry = self.cache[key]
-                self.cache_size_bytes -= entry.size_bytes
-                del self.cache[key]
-                invalidated_count += 1
+        for shard in self._shards:
+            with shard.lock:
+                keys_to_remove = [cache_key for cache_key, entry in shard.entries.items()
+                                  if invalidation_trigger in entry.invalidation_triggers]
+                if keys_to_remove:
+                    invalidated_count += shard.remove_many(keys_to_remove)
         
-        self.metrics['invalidations'] += invalidated_count
+        self.metrics['invalidations'].add(invalidated_count)
         if invalidated_count > 0:
             print(f"[MemoryCacheManager] 🧹 Invalidated {invalidated_count} entries for trigger: {invalidation_trigger}")
     
     def batch_memory_operations(self, operations: List[Dict[str, Any]], 
                                batch_type: str, user_context: str = "") -> str:
-        """Queue memory operations for intelligent batching"""
-        batch_id = f"batch_{int(time.time() * 1000)}_{hash(user_context) % 10000}"
+        """Queue memory operations for intelligent batching
+        
+        Operations for the same batch type and user context are coalesced into
+        one open batch, flushed once it reaches batch_threshold operations or
+        batch_timeout seconds after it was opened.
+        """
+        batch_key = (batch_type, user_context)
+        ready_batch = None
         
         with self.batch_lock:
-            batch = MemoryOperationBatch(
-                batch_id=batch_id,
-                operations=operations,
-                created_at=datetime.now(),
-                batch_type=batch_type,
-                priority=1,
-                user_context=user_context
-            )
+            batch = self.pending_batches.get(batch_key)
+            opened = batch is None
+            if opened:
+                batch = MemoryOperationBatch(
+                    batch_id=f"batch_{next(self._batch_sequence)}",
+                    operations=[],
+                    created_at=datetime.now(),
+                    batch_type=batch_type,
+                    priority=1,
+                    user_context=user_context
+                )
+                self.pending_batches[batch_key] = batch
             
-            self.pending_batches[batch_id] = batch
+            batch.operations.extend(operations)
             
             # Check if we should process immediately
-            if len(operations) >= self.batch_threshold:
-                self._process_batch_immediate(batch_id)
-            else:
-                # Schedule for later processing
-                threading.Timer(self.batch_timeout, self._process_batch_delayed, [batch_id]).start()
+            if len(batch.operations) >= self.batch_threshold:
+                ready_batch = self.pending_batches.pop(batch_key)
+            elif opened:
+                # Schedule the timeout flush once, when the batch is opened
+                self._batch_schedule.put((time.monotonic() + self.batch_timeout, batch.batch_id, batch_key))
+        
+        if ready_batch is not None:
+            self._execute_batch(ready_batch)
         
-        return batch_id
+        return batch.batch_id
     
-    def preload_contextual_memory(self, context_pattern: str, user_context: str = ""):
-        """Proactively preload memory based on context patterns"""
-        if context_pattern in self.preload_queue:
-            return  # Already queued
+    def preload_contextual_memory(self, context_pattern: str, user_context: str = "") -> Future:
+        """Proactively preload memory based on context patterns
         
-        self.preload_queue.add(context_pattern)
+        Concurrent requests for the same pattern share one in-flight preload.
+        """
+        with self.preload_lock:
+            future = self.preload_queue.get(context_pattern)
+            if future is not None:
+                return future  # Already queued
+            
+            # Submit preload task
+            future = self.preload_executor.submit(self._execute_preload, context_pattern, user_context)
+            self.preload_queue[context_pattern] = future
         
-        # Submit preload task
-        future = self.preload_executor.submit(self._execute_preload, context_pattern, user_context)
-        future.add_done_callback(lambda f: self.preload_queue.discard(context_pattern))
+        future.add_done_callback(lambda f: self._finish_preload(context_pattern, f))
+        return future
+    
+    def _finish_preload(self, context_pattern: str, future: Future):
+        """Remove a completed preload from the in-flight map"""
+        with self.preload_lock:
+            if self.preload_queue.get(context_pattern) is future:
+                del self.preload_queue[context_pattern]
     
     def get_intelligent_memory_suggestions(self, user_context: str, 
                                          current_query: str) -> List[str]:
@@ -267,31 +639,53 @@ class MemoryCacheManager:
         suggestions = []
         
         with self.pattern_lock:
-            # Look for similar access patterns
-            if user_context in self.access_patterns:
-                recent_accesses = self.access_patterns[user_context][-10:]  # Last 10 accesses
-                
-                # Find commonly accessed items after similar queries
-                query_hash = hashlib.md5(current_query.lower().encode()).hexdigest()[:8]
+            # Look up accesses that followed a key embedding this query's hash
+            context_index = self._next_access_index.get(user_context)
+            if context_index:
+                followers = context_index.get(_query_hash(current_query), ())
                 
-                for i, access in enumerate(recent_accesses[:-1]):
-                    if query_hash in access:
-                        # Found similar query, suggest next access
-                        next_access = recent_accesses[i + 1]
-                        suggestions.append(next_access)
+                # Only consider pairs within the recent access window
+                window_start = self._access_counts[user_context] - _SUGGESTION_WINDOW
+                suggestions = [next_access for position, next_access in followers
+                               if position >= window_start]
         
         return list(set(suggestions))  # Remove duplicates
     
-    def _record_access_pattern(self, cache_key: str, context_tags: Set[str]):
+    def _record_access_pattern(self, cache_key: str, context_tags: Set[str],
+                               primary_context: str = None):
         """Record access pattern for learning"""
-        if context_tags:
+        if primary_context is None and context_tags:
             primary_context = next(iter(context_tags))  # Use first tag as primary context
-            
+        
+        if primary_context is not None:
             with self.pattern_lock:
-                self.access_patterns[primary_context].append(cache_key)
+                sequence = self.access_patterns[primary_context]
+                position = self._access_counts[primary_context]
+                
+                # Index this access as the follower of the previous one
+                if sequence:
+                    context_index = self._next_access_index[primary_context]
+                    for embedded_hash in _embedded_query_hashes(sequence[-1]):
+                        followers = context_index[embedded_hash]
+                        followers.append((position - 1, cache_key))
+                        if len(followers) > _SUGGESTION_WINDOW:
+                            del followers[0]
+                
+                sequence.append(cache_key)
+                self._access_counts[primary_context] = position + 1
+                
                 # Keep only recent patterns
-                if len(self.access_patterns[primary_context]) > 100:
-                    self.access_patterns[primary_context] = self.access_patterns[primary_context][-50:]
+                if len(sequence) > 100:
+                    self.access_patterns[primary_context] = sequence[-50:]
+                    self._prune_next_access_index(primary_context)
+    
+    def _prune_next_access_index(self, context: str):
+        """Drop index entries that fell out of the suggestion window (caller holds pattern_lock)"""
+        window_start = self._access_counts[context] - _SUGGESTION_WINDOW
+        context_index = self._next_access_index[context]
+        for embedded_hash in [h for h, followers in context_index.items()
+                              if not followers or followers[-1][0] < window_start]:
+            del context_index[embedded_hash]
     
     def _record_context_associations(self, cache_key: str, context_tags: Set[str]):
         """Record associations between contexts and cache keys"""
@@ -314,51 +708,65 @@ class MemoryCacheManager:
         
         # Preload up to 3 related items
         for key in list(related_keys)[:3]:
-            if key not in self.cache and key != missed_key:
+            if key != missed_key and not self._contains(key):
                 self.preload_contextual_memory(key)
     
-    def _evict_lru_entry(self):
-        """Evict least recently used cache entry"""
-        if not self.cache:
+    def _evict_lru_entry(self, shard: _CacheShard):
+        """Evict an approximately least recently used entry of a shard (caller holds shard.lock)"""
+        if not shard.entries:
             return
         
-        # Get least recently used key
-        lru_key = next(iter(self.cache))
-        entry = self.cache[lru_key]
+        # Sample a few entries and evict the one accessed longest ago
+        entries = shard.entries
+        lru_key = min(shard.sample_keys(self.eviction_sample_size),
+                      key=lambda key: entries[key].last_accessed)
         
         # Remove from cache
-        self.cache_size_bytes -= entry.size_bytes
-        del self.cache[lru_key]
+        shard.remove(lru_key)
         
-        self.metrics['evictions'] += 1
-        print(f"[MemoryCacheManager] 🗑️ Evicted LRU entry: {lru_key[:20]}...")
+        self.metrics['evictions'].increment()
+        if self.debug:
+            print(f"[MemoryCacheManager] 🗑️ Evicted LRU entry: {lru_key[:20]}...")
     
-    def _process_batch_immediate(self, batch_id: str):
-        """Process batch immediately"""
+    def _run_batch_scheduler(self):
+        """Flush batches whose timeout has elapsed (runs on a dedicated thread)"""
+        while True:
+            deadline, batch_id, batch_key = self._batch_schedule.get()
+            if batch_key is None:
+                return  # Shutdown sentinel
+            delay = deadline - time.monotonic()
+            if delay > 0:
+                self._batch_scheduler_stop.wait(delay)  # Cut short by shutdown
+            try:
+                self._process_batch_delayed(batch_key, batch_id)
+            except Exception as e:
+                print(f"[MemoryCacheManager] ❌ Scheduled batch flush failed: {e}")
+    
+    def _process_batch_delayed(self, batch_key: Tuple[str, str], batch_id: str):
+        """Process batch after timeout"""
         with self.batch_lock:
-            if batch_id not in self.pending_batches:
-                return
+            batch = self.pending_batches.get(batch_key)
+            if batch is None or batch.batch_id != batch_id:
+                return  # Already processed (a newer batch may be open for this key)
             
-            batch = self.pending_batches[batch_id]
-            del self.pending_batches[batch_id]
+            del self.pending_batches[batch_key]
         
         self._execute_batch(batch)
     
-    def _process_batch_delayed(self, batch_id: str):
-        """Process batch after timeout"""
+    def _flush_pending_batches(self):
+        """Execute every open batch now, without waiting for its timeout"""
         with self.batch_lock:
-            if batch_id not in self.pending_batches:
-                return  # Already processed
-            
-            batch = self.pending_batches[batch_id]
-            del self.pending_batches[batch_id]
+            batches = list(self.pending_batches.values())
+            self.pending_batches.clear()
         
-        self._execute_batch(batch)
+        for batch in batches:
+            self._execute_batch(batch)
     
     def _execute_batch(self, batch: MemoryOperationBatch):
         """Execute a batch of memory operations"""
         try:
-            print(f"[MemoryCacheManager] 📦 Processing batch: {batch.batch_id} ({len(batch.operations)} ops)")
+            if self.debug:
+                print(f"[MemoryCacheManager] 📦 Processing batch: {batch.batch_id} ({len(batch.operations)} ops)")
             
             if batch.batch_type == 'read':
                 self._execute_read_batch(batch)
@@ -367,32 +775,41 @@ class MemoryCacheManager:
             elif batch.batch_type == 'extract':
                 self._execute_extract_batch(batch)
             
-            self.metrics['batch_operations'] += 1
+            self.metrics['batch_operations'].increment()
             
         except Exception as e:
             print(f"[MemoryCacheManager] ❌ Batch execution failed: {e}")
     
     def _execute_read_batch(self, batch: MemoryOperationBatch):
         """Execute batch of read operations"""
-        # Group operations by similar patterns for efficiency
+        # Group operations by key so each unique key is read once
+        operations_by_key: Dict[str, List[Dict[str, Any]]] = {}
         for operation in batch.operations:
-            # Simulate read operation
             cache_key = operation.get('cache_key', '')
             if cache_key:
-                # Check if already cached
-                cached_data = self.get_cached_memory(cache_key)
-                if not cached_data:
-                    # Simulate loading from storage
-                    operation['result'] = f"Batch loaded: {cache_key}"
+                operations_by_key.setdefault(cache_key, []).append(operation)
+        
+        for cache_key, operations in operations_by_key.items():
+            # Check if already cached
+            cached_data = self.get_cached_memory(cache_key)
+            if not cached_data:
+                # Simulate loading from storage, fanned out to every requester
+                result = f"Batch loaded: {cache_key}"
+                for operation in operations:
+                    operation['result'] = result
     
     def _execute_write_batch(self, batch: MemoryOperationBatch):
         """Execute batch of write operations"""
-        # Group writes for efficient storage
+        # Coalesce writes so only the last write per key is applied
+        writes: Dict[str, Any] = {}
         for operation in batch.operations:
             cache_key = operation.get('cache_key', '')
             data = operation.get('data')
             if cache_key and data:
-                self.cache_memory_data(cache_key, data)
+                writes[cache_key] = data
+        
+        for cache_key, data in writes.items():
+            self.cache_memory_data(cache_key, data)
     
     def _execute_extract_batch(self, batch: MemoryOperationBatch):
         """Execute batch of extraction operations"""
@@ -400,7 +817,8 @@ class MemoryCacheManager:
         combined_text = " | ".join([op.get('text', '') for op in batch.operations])
         if combined_text:
             # Simulate extraction
-            print(f"[MemoryCacheManager] 🧠 Batch extraction: {len(batch.operations)} items")
+            if self.debug:
+                print(f"[MemoryCacheManager] 🧠 Batch extraction: {len(batch.operations)} items")
     
     def _execute_preload(self, context_pattern: str, user_context: str):
         """Execute preload operation"""
@@ -409,7 +827,7 @@ class MemoryCacheManager:
             cache_key = f"preload_{context_pattern}_{user_context}"
             
             # Check if already cached
-            if cache_key not in self.cache:
+            if not self._contains(cache_key):
                 # Simulate loading data
                 preload_data = f"Preloaded data for {context_pattern}"
                 
@@ -419,8 +837,9 @@ class MemoryCacheManager:
                     context_tags={user_context, "preloaded"},
                     invalidation_triggers={"context_change", "user_logout"}
                 ):
-                    self.metrics['preload_successes'] += 1
-                    print(f"[MemoryCacheManager] 🔮 Preloaded: {context_pattern}")
+                    self.metrics['preload_successes'].increment()
+                    if self.debug:
+                        print(f"[MemoryCacheManager] 🔮 Preloaded: {context_pattern}")
         
         except Exception as e:
             print(f"[MemoryCacheManager] ❌ Preload failed: {e}")
@@ -446,111 +865,192 @@ class MemoryCacheManager:
     
     def _clean_expired_entries(self):
         """Remove expired cache entries"""
-        current_time = datetime.now()
-        expired_keys = []
-        
-        with self.cache_lock:
-            for cache_key, entry in self.cache.items():
-                # Consider entries expired if not accessed for 1 hour
-                if current_time - entry.last_accessed > timedelta(hours=1):
-                    expired_keys.append(cache_key)
+        # Consider entries expired if not accessed for 1 hour
+        cutoff = time.monotonic_ns() - _CACHE_ENTRY_TTL_NS
+        expired_count = 0
         
-        for key in expired_keys:
-            with self.cache_lock:
-                if key in self.cache:
-                    entry = self.cache[key]
-                    self.cache_size_bytes -= entry.size_bytes
-                    del self.cache[key]
+        for shard in self._shards:
+            with shard.lock:
+                expired_count += len(shard.pop_expired(cutoff))
         
-        if expired_keys:
-            print(f"[MemoryCacheManager] 🧹 Cleaned {len(expired_keys)} expired entries")
+        if expired_count:
+            print(f"[MemoryCacheManager] 🧹 Cleaned {expired_count} expired entries")
+    
+    def _iter_persistable(self):
+        """Yield (key, record) pairs for entries worth persisting, one shard at a time"""
+        for shard in self._shards:
+            with shard.lock:
+                # Only persist important entries to avoid large files
+                selected = [(key, entry) for key, entry in shard.entries.items()
+                            if (entry.access_count > 2 and 
+                                "important" in entry.context_tags or 
+                                entry.size_bytes < 10000)]  # Small entries
+            
+            for key, entry in selected:
+                data = entry.data
+                if isinstance(data, _CompressedValue):
+                    data = data.load()
+                yield key, {
+                    'data': data,
+                    'context_tags': list(entry.context_tags),
+                    'access_count': entry.access_count
+                }
     
     def _persist_cache(self):
-        """Persist cache to disk"""
+        """Persist cache to disk, streaming one tagged record at a time
+        
+        JSON-safe records are written as JSON so loading them never runs
+        pickle; anything else falls back to a pickle record.
+        """
+        # Written to a temp file and swapped in, so a crash mid-write never leaves a
+        # truncated cache file (unique per thread - maintenance and shutdown may overlap)
+        temp_path = f"{self.cache_file}.{os.getpid()}.{threading.get_ident()}.tmp"
         try:
-            # Only persist important entries to avoid large files
-            important_entries = {}
-            
-            with self.cache_lock:
-                for key, entry in self.cache.items():
-                    if (entry.access_count > 2 and 
-                        "important" in entry.context_tags or 
-                        entry.size_bytes < 10000):  # Small entries
-                        important_entries[key] = {
-                            'data': entry.data,
-                            'context_tags': list(entry.context_tags),
-                            'access_count': entry.access_count
-                        }
+            records = self._iter_persistable()
+            first = next(records, None)
+            if first is None:
+                # Nothing worth keeping - don't restore a stale snapshot next start
+                if os.path.exists(self.cache_file):
+                    os.remove(self.cache_file)
+                return
             
-            if important_entries:
-                with open(self.cache_file, 'wb') as f:
-                    pickle.dump(important_entries, f)
+            with open(temp_path, 'wb', buffering=1 << 20) as f:
+                for key, record in itertools.chain((first,), records):
+                    if _is_json_safe(record['data']):
+                        tag, payload = _RECORD_JSON, _json_dumps([key, record])
+                    else:
+                        tag = _RECORD_PICKLE
+                        payload = pickle.dumps((key, record), protocol=pickle.HIGHEST_PROTOCOL)
+                    f.write(_RECORD_HEADER.pack(tag, len(payload)))
+                    f.write(payload)
+            os.replace(temp_path, self.cache_file)
         
         except Exception as e:
             print(f"[MemoryCacheManager] ❌ Cache persistence failed: {e}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+    
+    def _read_persisted_records(self, f):
+        """Yield (key, record) pairs from a persistence file
+        
+        Records that fail to decode are skipped; a truncated or unframed
+        stream ends the restore at the last good record.
+        """
+        if f.peek(1)[:1] not in (_RECORD_JSON, _RECORD_PICKLE):
+            # Legacy format: a pickle stream (a single dict, or (key, record) tuples)
+            while True:
+                try:
+                    item = pickle.load(f)
+                except EOFError:
+                    return
+                except Exception as e:
+                    # No framing to resync on - keep what was read so far
+                    print(f"[MemoryCacheManager] ⚠️ Stopped reading legacy cache file: {e}")
+                    return
+                if isinstance(item, dict):
+                    yield from item.items()
+                else:
+                    yield item
+        
+        header_size = _RECORD_HEADER.size
+        while True:
+            header = f.read(header_size)
+            if len(header) < header_size:
+                return
+            tag, length = _RECORD_HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length:
+                return
+            try:
+                if tag == _RECORD_JSON:
+                    key, record = _json_loads(payload)
+                else:
+                    key, record = pickle.loads(payload)
+            except Exception as e:
+                print(f"[MemoryCacheManager] ⚠️ Skipped unreadable cache record: {e}")
+                continue
+            yield key, record
     
     def _load_persistent_cache(self):
         """Load persisted cache from disk"""
         try:
             if os.path.exists(self.cache_file):
-                with open(self.cache_file, 'rb') as f:
-                    persisted_data = pickle.load(f)
-                
-                # Restore important entries
-                for key, entry_data in persisted_data.items():
-                    self.cache_memory_data(
-                        key,
-                        entry_data['data'],
-                        context_tags=set(entry_data.get('context_tags', [])),
-                        invalidation_triggers={"system_restart"}
-                    )
+                restored = 0
+                with open(self.cache_file, 'rb', buffering=1 << 20) as f:
+                    # Restore important entries
+                    for item in self._read_persisted_records(f):
+                        try:
+                            key, entry_data = item
+                            self.cache_memory_data(
+                                key,
+                                entry_data['data'],
+                                context_tags=set(entry_data.get('context_tags', [])),
+                                invalidation_triggers={"system_restart"}
+                            )
+                        except Exception as e:
+                            print(f"[MemoryCacheManager] ⚠️ Skipped malformed cache record: {e}")
+                            continue
+                        restored += 1
                 
-                print(f"[MemoryCacheManager] 💾 Restored {len(persisted_data)} cache entries")
+                print(f"[MemoryCacheManager] 💾 Restored {restored} cache entries")
         
         except Exception as e:
             print(f"[MemoryCacheManager] ❌ Cache loading failed: {e}")
     
+    def _metrics_snapshot(self) -> Dict[str, int]:
+        """Read all metric counters into a plain dict"""
+        return {name: counter.value for name, counter in self.metrics.items()}
+    
     def _log_metrics(self):
         """Log performance metrics"""
+        metrics = self._metrics_snapshot()
         hit_rate = 0
-        if self.metrics['cache_hits'] + self.metrics['cache_misses'] > 0:
-            hit_rate = self.metrics['cache_hits'] / (self.metrics['cache_hits'] + self.metrics['cache_misses']) * 100
+        if metrics['cache_hits'] + metrics['cache_misses'] > 0:
+            hit_rate = metrics['cache_hits'] / (metrics['cache_hits'] + metrics['cache_misses']) * 100
         
         print(f"[MemoryCacheManager] 📊 Metrics - Hit Rate: {hit_rate:.1f}%, "
               f"Cache Size: {self.cache_size_bytes / 1024 / 1024:.1f}MB, "
-              f"Entries: {len(self.cache)}")
+              f"Entries: {self._entry_count()}")
     
     def get_performance_metrics(self) -> Dict[str, Any]:
         """Get comprehensive performance metrics"""
-        with self.cache_lock:
-            hit_rate = 0
-            if self.metrics['cache_hits'] + self.metrics['cache_misses'] > 0:
-                hit_rate = self.metrics['cache_hits'] / (self.metrics['cache_hits'] + self.metrics['cache_misses']) * 100
-            
-            return {
-                'cache_metrics': dict(self.metrics),
-                'cache_stats': {
-                    'hit_rate_percent': hit_rate,
-                    'cache_size_mb': self.cache_size_bytes / 1024 / 1024,
-                    'cache_entries': len(self.cache),
-                    'max_size_mb': self.max_cache_size_mb
-                },
-                'batch_stats': {
-                    'pending_batches': len(self.pending_batches),
-                    'batch_threshold': self.batch_threshold,
-                    'batch_timeout': self.batch_timeout
-                },
-                'pattern_stats': {
-                    'learned_patterns': len(self.access_patterns),
-                    'context_associations': len(self.context_associations),
-                    'preload_queue_size': len(self.preload_queue)
-                }
+        metrics = self._metrics_snapshot()
+        hit_rate = 0
+        if metrics['cache_hits'] + metrics['cache_misses'] > 0:
+            hit_rate = metrics['cache_hits'] / (metrics['cache_hits'] + metrics['cache_misses']) * 100
+        
+        return {
+            'cache_metrics': metrics,
+            'cache_stats': {
+                'hit_rate_percent': hit_rate,
+                'cache_size_mb': self.cache_size_bytes / 1024 / 1024,
+                'cache_entries': self._entry_count(),
+                'max_size_mb': self.max_cache_size_mb
+            },
+            'batch_stats': {
+                'pending_batches': len(self.pending_batches),
+                'batch_threshold': self.batch_threshold,
+                'batch_timeout': self.batch_timeout
+            },
+            'pattern_stats': {
+                'learned_patterns': len(self.access_patterns),
+                'context_associations': len(self.context_associations),
+                'preload_queue_size': len(self.preload_queue)
             }
+        }
     
     def shutdown(self):
         """Gracefully shutdown the cache manager"""
         print("[MemoryCacheManager] 🛑 Shutting down memory cache manager...")
         
+        # Stop the batch scheduler, then run batches still waiting for their timeout
+        self._batch_scheduler_stop.set()
+        self._batch_schedule.put((float('-inf'), '', None))
+        self._batch_scheduler_thread.join()
+        self._flush_pending_batches()
+        
         # Persist final cache state
         if self.cache_persistence:
             self._persist_cache()
@@ -577,10 +1077,11 @@ def cache_memory_intelligent(cache_key: str, data: Any,
     manager = get_memory_cache_manager()
     return manager.cache_memory_data(cache_key, data, context_tags, invalidation_triggers)
 
-def get_cached_memory_intelligent(cache_key: str, context_tags: Set[str] = None) -> Optional[Any]:
+def get_cached_memory_intelligent(cache_key: str, context_tags: Set[str] = None,
+                                  primary_context: str = None) -> Optional[Any]:
     """Get intelligently cached memory data"""
     manager = get_memory_cache_manager()
-    return manager.get_cached_memory(cache_key, context_tags)
+    return manager.get_cached_memory(cache_key, context_tags, primary_context)
 
 def invalidate_memory_cache(invalidation_trigger: str):
     """Invalidate memory cache based on trigger"""
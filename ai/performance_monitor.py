@@ -6,14 +6,39 @@ Purpose: Track response times, detect performance issues, and provide metrics
 
 import time
 import threading
+import bisect
 import json
 import os
-from typing import Dict, Any, List, Optional
-from dataclasses import dataclass, asdict
+import queue
+import atexit
+import logging
+from typing import Dict, Any, List, Optional, Hashable
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from collections import deque, defaultdict
+from collections import deque, defaultdict, Counter
 from enum import Enum
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Output goes through the module logger; handlers and levels are left to the application
+logger = logging.getLogger(__name__)
+
+def _json_dumps(obj: Any, indent: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON bytes, using orjson when available"""
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, option=option)
+    return json.dumps(obj, indent=2 if indent else None).encode('utf-8')
+
+def _json_loads(data: bytes) -> Any:
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
 class PerformanceLevel(Enum):
     EXCELLENT = "excellent"    # < 2 seconds
     GOOD = "good"             # 2-5 seconds
@@ -21,7 +46,11 @@ class PerformanceLevel(Enum):
     SLOW = "slow"             # 10-30 seconds
     CRITICAL = "critical"     # > 30 seconds
 
-@dataclass
+# Upper duration bounds (exclusive) of each level above, in seconds
+_PERFORMANCE_LEVEL_BOUNDS = (2.0, 5.0, 10.0, 30.0)
+_PERFORMANCE_LEVELS = tuple(PerformanceLevel)
+
+@dataclass(slots=True)
 class PerformanceMetric:
     """Single performance measurement"""
     timestamp: float
@@ -32,20 +61,18 @@ class PerformanceMetric:
     context: Dict[str, Any] = None
     
     def to_dict(self) -> Dict[str, Any]:
-        return asdict(self)
+        return {
+            'timestamp': self.timestamp,
+            'operation': self.operation,
+            'duration': self.duration,
+            'status': self.status,
+            'error': self.error,
+            'context': self.context
+        }
     
     def get_performance_level(self) -> PerformanceLevel:
         """Classify performance level based on duration"""
-        if self.duration < 2.0:
-            return PerformanceLevel.EXCELLENT
-        elif self.duration < 5.0:
-            return PerformanceLevel.GOOD
-        elif self.duration < 10.0:
-            return PerformanceLevel.ACCEPTABLE
-        elif self.duration < 30.0:
-            return PerformanceLevel.SLOW
-        else:
-            return PerformanceLevel.CRITICAL
+        return _PERFORMANCE_LEVELS[bisect.bisect_right(_PERFORMANCE_LEVEL_BOUNDS, self.duration)]
 
 class PerformanceMonitor:
     """Monitor and track system performance metrics"""
@@ -54,6 +81,13 @@ class PerformanceMonitor:
         self.save_path = save_path
         self.max_metrics = max_metrics
         self.metrics: deque = deque(maxlen=max_metrics)
+        
+        # Metrics are persisted as an append-only NDJSON log next to save_path;
+        # save_metrics appends only what was recorded since the last save
+        self.metrics_log_path = os.path.splitext(save_path)[0] + ".ndjson"
+        self._unsaved_metrics: deque = deque(maxlen=max_metrics)
+        self._logged_metric_count = 0  # Lines in the log, compacted past 2x max_metrics
+        self._metrics_log_needs_rewrite = False
         self.operation_stats: Dict[str, Dict] = defaultdict(lambda: {
             'count': 0,
             'total_duration': 0.0,
@@ -61,10 +95,25 @@ class PerformanceMonitor:
             'max_duration': 0.0,
             'success_count': 0,
             'error_count': 0,
-            'last_measurement': None
+            'last_measurement': None,
+            'average_duration': 0.0,
+            'success_rate': 0.0
         })
+        # Recording a metric doesn't take self.lock: deque appends and dict
+        # setitem/pop are atomic, and per-operation stats have their own locks.
+        # self.lock only guards the rolling aggregates and save/load.
         self.lock = threading.Lock()
-        self.active_operations: Dict[str, float] = {}  # Track ongoing operations
+        self._operation_locks: Dict[str, threading.Lock] = {}
+        self.active_operations: Dict[str, int] = {}  # Ongoing operations -> perf_counter_ns() start
+        
+        # Rolling aggregates over the last hour of metrics. Writers only queue
+        # new metrics; get_overall_stats folds them in under self.lock
+        self.recent_window_seconds = 3600
+        self._pending_recent: deque = deque(maxlen=max_metrics)
+        self._recent_metrics: deque = deque()  # (timestamp, duration, is_error, level)
+        self._recent_duration_total = 0.0
+        self._recent_error_count = 0
+        self._recent_level_counts: Counter = Counter()
         
         # Performance thresholds (configurable)
         self.thresholds = {
@@ -75,78 +124,143 @@ class PerformanceMonitor:
             'voice_recognition': 2.0
         }
         
+        # Critical issues are appended to the log file by a background writer,
+        # batched every critical_log_interval seconds
+        self.critical_log_path = "critical_performance_issues.log"
+        self.critical_log_interval = 0.5
+        self._critical_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._critical_log_pending = threading.Event()
+        self._critical_log_write_lock = threading.Lock()
+        self._critical_log_thread = threading.Thread(
+            target=self._critical_log_writer, daemon=True, name="PerformanceCriticalLog"
+        )
+        self._critical_log_thread.start()
+        atexit.register(self.flush_critical_log)
+        
         # Load existing metrics
         self._load_metrics()
         
-        print("[PerformanceMonitor] ✅ Performance monitoring initialized")
+        logger.info("[PerformanceMonitor] ✅ Performance monitoring initialized")
     
-    def start_operation(self, operation_id: str) -> str:
+    def start_operation(self, operation_id: Hashable) -> Hashable:
         """Start tracking an operation"""
-        with self.lock:
-            start_time = time.time()
-            self.active_operations[operation_id] = start_time
-            return operation_id
+        # Durations use the monotonic high-resolution clock; time.time() is wall-clock only
+        self.active_operations[operation_id] = time.perf_counter_ns()
+        return operation_id
     
-    def end_operation(self, operation_id: str, operation_name: str, status: str = "success", 
+    def end_operation(self, operation_id: Hashable, operation_name: str, status: str = "success", 
                      error: Optional[str] = None, context: Dict[str, Any] = None) -> PerformanceMetric:
         """End tracking an operation and record metric"""
-        with self.lock:
-            if operation_id not in self.active_operations:
-                print(f"[PerformanceMonitor] ⚠️ Operation {operation_id} not found in active operations")
-                return None
-            
-            start_time = self.active_operations.pop(operation_id)
-            duration = time.time() - start_time
-            
-            metric = PerformanceMetric(
-                timestamp=time.time(),
-                operation=operation_name,
-                duration=duration,
-                status=status,
-                error=error,
-                context=context or {}
-            )
-            
-            self.metrics.append(metric)
-            self._update_operation_stats(metric)
-            
-            # Check for performance issues
-            self._check_performance_threshold(metric)
-            
-            return metric
+        try:
+            start_ns = self.active_operations.pop(operation_id)
+        except KeyError:
+            logger.warning("[PerformanceMonitor] ⚠️ Operation %s not found in active operations", operation_id)
+            return None
+        
+        duration = (time.perf_counter_ns() - start_ns) / 1e9
+        
+        metric = PerformanceMetric(
+            timestamp=time.time(),
+            operation=operation_name,
+            duration=duration,
+            status=status,
+            error=error,
+            context=context or {}
+        )
+        
+        self.metrics.append(metric)
+        self._unsaved_metrics.append(metric)
+        self._update_operation_stats(metric)
+        
+        # Check for performance issues
+        self._check_performance_threshold(metric)
+        
+        return metric
     
     def record_metric(self, operation_name: str, duration: float, status: str = "success",
                      error: Optional[str] = None, context: Dict[str, Any] = None) -> PerformanceMetric:
         """Record a metric directly (for operations not tracked with start/end)"""
-        with self.lock:
-            metric = PerformanceMetric(
-                timestamp=time.time(),
-                operation=operation_name,
-                duration=duration,
-                status=status,
-                error=error,
-                context=context or {}
-            )
-            
-            self.metrics.append(metric)
-            self._update_operation_stats(metric)
-            self._check_performance_threshold(metric)
-            
-            return metric
+        metric = PerformanceMetric(
+            timestamp=time.time(),
+            operation=operation_name,
+            duration=duration,
+            status=status,
+            error=error,
+            context=context or {}
+        )
+        
+        self.metrics.append(metric)
+        self._unsaved_metrics.append(metric)
+        self._update_operation_stats(metric)
+        self._check_performance_threshold(metric)
+        
+        return metric
+    
+    def _operation_lock(self, operation_name: str) -> threading.Lock:
+        """Get the lock guarding one operation's stats"""
+        lock = self._operation_locks.get(operation_name)
+        if lock is None:
+            lock = self._operation_locks.setdefault(operation_name, threading.Lock())
+        return lock
     
     def _update_operation_stats(self, metric: PerformanceMetric):
         """Update statistics for an operation"""
-        stats = self.operation_stats[metric.operation]
-        stats['count'] += 1
-        stats['total_duration'] += metric.duration
-        stats['min_duration'] = min(stats['min_duration'], metric.duration)
-        stats['max_duration'] = max(stats['max_duration'], metric.duration)
-        stats['last_measurement'] = metric.timestamp
+        with self._operation_lock(metric.operation):
+            stats = self.operation_stats[metric.operation]
+            stats['count'] += 1
+            stats['total_duration'] += metric.duration
+            stats['min_duration'] = min(stats['min_duration'], metric.duration)
+            stats['max_duration'] = max(stats['max_duration'], metric.duration)
+            stats['last_measurement'] = metric.timestamp
+            
+            if metric.status == "success":
+                stats['success_count'] += 1
+            else:
+                stats['error_count'] += 1
+            
+            stats['average_duration'] = stats['total_duration'] / stats['count']
+            stats['success_rate'] = stats['success_count'] / stats['count']
+        
+        self._pending_recent.append(metric)
+    
+    def _fold_pending_recent_metrics(self):
+        """Move queued metrics into the rolling aggregates (caller holds self.lock)"""
+        pending = self._pending_recent
+        while pending:
+            try:
+                metric = pending.popleft()
+            except IndexError:
+                break
+            self._add_recent_metric(metric)
+    
+    def _add_recent_metric(self, metric: PerformanceMetric):
+        """Add a metric to the rolling last-hour aggregates"""
+        is_error = metric.status != "success"
+        level = metric.get_performance_level().value
+        self._recent_metrics.append((metric.timestamp, metric.duration, is_error, level))
+        self._recent_duration_total += metric.duration
+        self._recent_error_count += is_error
+        self._recent_level_counts[level] += 1
         
-        if metric.status == "success":
-            stats['success_count'] += 1
-        else:
-            stats['error_count'] += 1
+        # The window never covers more metrics than self.metrics retains
+        while len(self._recent_metrics) > self.max_metrics:
+            self._drop_oldest_recent_metric()
+    
+    def _drop_oldest_recent_metric(self):
+        """Remove the oldest entry from the rolling aggregates"""
+        _, duration, is_error, level = self._recent_metrics.popleft()
+        self._recent_duration_total -= duration
+        self._recent_error_count -= is_error
+        self._recent_level_counts[level] -= 1
+        
+        if not self._recent_metrics:
+            self._recent_duration_total = 0.0  # Don't let float error accumulate
+    
+    def _expire_recent_metrics(self, now: float):
+        """Drop metrics older than the rolling window from the aggregates"""
+        cutoff = now - self.recent_window_seconds
+        while self._recent_metrics and self._recent_metrics[0][0] <= cutoff:
+            self._drop_oldest_recent_metric()
     
     def _check_performance_threshold(self, metric: PerformanceMetric):
         """Check if operation exceeded performance threshold"""
@@ -154,54 +268,82 @@ class PerformanceMonitor:
         
         if metric.duration > threshold:
             level = metric.get_performance_level()
-            print(f"[PerformanceMonitor] ⚠️ SLOW OPERATION: {metric.operation} took {metric.duration:.2f}s (threshold: {threshold}s) - {level.value}")
+            # %-style arguments are only formatted if a handler emits the record
+            logger.warning("[PerformanceMonitor] ⚠️ SLOW OPERATION: %s took %.2fs (threshold: %ss) - %s",
+                           metric.operation, metric.duration, threshold, level.value)
             
             # Log critical performance issues
             if level == PerformanceLevel.CRITICAL:
                 self._log_critical_performance_issue(metric, threshold)
     
     def _log_critical_performance_issue(self, metric: PerformanceMetric, threshold: float):
-        """Log critical performance issues to file"""
-        try:
-            log_entry = {
-                'timestamp': datetime.fromtimestamp(metric.timestamp).isoformat(),
-                'operation': metric.operation,
-                'duration': metric.duration,
-                'threshold': threshold,
-                'status': metric.status,
-                'error': metric.error,
-                'context': metric.context
-            }
+        """Queue a critical performance issue for the background log writer"""
+        self._critical_log_queue.put((metric, threshold))
+        self._critical_log_pending.set()
+    
+    def _critical_log_writer(self):
+        """Append queued critical issues to the log file in batches"""
+        while True:
+            # Entries only leave the queue under the write lock, so the exit
+            # flush always sees everything that hasn't been written yet
+            self._critical_log_pending.wait()
+            time.sleep(self.critical_log_interval)  # Let a burst accumulate
+            self._critical_log_pending.clear()
+            self._write_critical_entries([])
+    
+    def flush_critical_log(self):
+        """Write any queued critical issues now"""
+        self._write_critical_entries([])
+    
+    def _write_critical_entries(self, pending: List[tuple]):
+        """Drain the critical-issue queue and append everything to the log file"""
+        with self._critical_log_write_lock:
+            while True:
+                try:
+                    pending.append(self._critical_log_queue.get_nowait())
+                except queue.Empty:
+                    break
             
-            with open("critical_performance_issues.log", "a") as f:
-                f.write(json.dumps(log_entry) + "\n")
+            if not pending:
+                return
+            
+            try:
+                lines = []
+                for metric, threshold in pending:
+                    log_entry = {
+                        'timestamp': datetime.fromtimestamp(metric.timestamp).isoformat(),
+                        'operation': metric.operation,
+                        'duration': metric.duration,
+                        'threshold': threshold,
+                        'status': metric.status,
+                        'error': metric.error,
+                        'context': metric.context
+                    }
+                    lines.append(_json_dumps(log_entry) + b"\n")
                 
-        except Exception as e:
-            print(f"[PerformanceMonitor] ❌ Failed to log critical issue: {e}")
+                with open(self.critical_log_path, "ab") as f:
+                    f.writelines(lines)
+                    
+            except Exception as e:
+                logger.error("[PerformanceMonitor] ❌ Failed to log critical issue: %s", e)
     
     def get_operation_stats(self, operation_name: str) -> Dict[str, Any]:
         """Get statistics for a specific operation"""
-        with self.lock:
-            if operation_name not in self.operation_stats:
-                return None
-                
-            stats = self.operation_stats[operation_name].copy()
-            if stats['count'] > 0:
-                stats['average_duration'] = stats['total_duration'] / stats['count']
-                stats['success_rate'] = stats['success_count'] / stats['count']
-            else:
-                stats['average_duration'] = 0.0
-                stats['success_rate'] = 0.0
-                
-            return stats
+        if operation_name not in self.operation_stats:
+            return None
+        
+        with self._operation_lock(operation_name):
+            return self.operation_stats[operation_name].copy()
     
     def get_overall_stats(self) -> Dict[str, Any]:
         """Get overall performance statistics"""
         with self.lock:
             now = time.time()
-            recent_metrics = [m for m in self.metrics if now - m.timestamp < 3600]  # Last hour
+            self._fold_pending_recent_metrics()
+            self._expire_recent_metrics(now)  # Last hour
+            recent_count = len(self._recent_metrics)
             
-            if not recent_metrics:
+            if not recent_count:
                 return {
                     'total_operations': 0,
                     'recent_operations': 0,
@@ -210,75 +352,113 @@ class PerformanceMonitor:
                     'error_rate': 0.0
                 }
             
-            total_duration = sum(m.duration for m in recent_metrics)
-            error_count = sum(1 for m in recent_metrics if m.status != "success")
-            
             # Performance level distribution
-            distribution = defaultdict(int)
-            for metric in recent_metrics:
-                level = metric.get_performance_level()
-                distribution[level.value] += 1
+            distribution = {level: count for level, count in self._recent_level_counts.items() if count}
             
             return {
                 'total_operations': len(self.metrics),
-                'recent_operations': len(recent_metrics),
-                'average_response_time': total_duration / len(recent_metrics),
-                'performance_distribution': dict(distribution),
-                'error_rate': error_count / len(recent_metrics),
+                'recent_operations': recent_count,
+                'average_response_time': self._recent_duration_total / recent_count,
+                'performance_distribution': distribution,
+                'error_rate': self._recent_error_count / recent_count,
                 'active_operations': len(self.active_operations),
                 'timestamp': now
             }
     
     def get_slow_operations(self, threshold: float = 10.0, limit: int = 10) -> List[Dict[str, Any]]:
         """Get recent slow operations"""
-        with self.lock:
-            slow_ops = [
-                m.to_dict() for m in self.metrics 
-                if m.duration > threshold
-            ]
-            # Sort by duration, descending
-            slow_ops.sort(key=lambda x: x['duration'], reverse=True)
-            return slow_ops[:limit]
+        # Snapshot first - writers append to self.metrics without the lock
+        slow_ops = [
+            m.to_dict() for m in list(self.metrics) 
+            if m.duration > threshold
+        ]
+        # Sort by duration, descending
+        slow_ops.sort(key=lambda x: x['duration'], reverse=True)
+        return slow_ops[:limit]
     
     def save_metrics(self):
         """Save metrics to file"""
         try:
             with self.lock:
+                new_metrics = []
+                while self._unsaved_metrics:
+                    new_metrics.append(self._unsaved_metrics.popleft())
+                
+                if self._metrics_log_needs_rewrite or self._logged_metric_count + len(new_metrics) > 2 * self.max_metrics:
+                    # Compact: rewrite the log with just the metrics still retained
+                    with open(self.metrics_log_path, 'wb') as f:
+                        f.writelines(_json_dumps(m.to_dict()) + b"\n" for m in list(self.metrics))
+                    self._logged_metric_count = len(self.metrics)
+                    self._metrics_log_needs_rewrite = False
+                elif new_metrics:
+                    with open(self.metrics_log_path, 'ab') as f:
+                        f.writelines(_json_dumps(m.to_dict()) + b"\n" for m in new_metrics)
+                    self._logged_metric_count += len(new_metrics)
+                
                 data = {
-                    'metrics': [m.to_dict() for m in list(self.metrics)],
                     'operation_stats': dict(self.operation_stats),
                     'thresholds': self.thresholds,
                     'timestamp': time.time()
                 }
                 
-                with open(self.save_path, 'w') as f:
-                    json.dump(data, f, indent=2)
+                with open(self.save_path, 'wb') as f:
+                    f.write(_json_dumps(data, indent=True))
                     
         except Exception as e:
-            print(f"[PerformanceMonitor] ❌ Failed to save metrics: {e}")
+            logger.error("[PerformanceMonitor] ❌ Failed to save metrics: %s", e)
     
     def _load_metrics(self):
         """Load metrics from file"""
         try:
+            # Load recent metrics (last 24 hours)
+            cutoff_time = time.time() - 86400
+            metric_records = []
+            
             if os.path.exists(self.save_path):
-                with open(self.save_path, 'r') as f:
-                    data = json.load(f)
+                with open(self.save_path, 'rb') as f:
+                    data = _json_loads(f.read())
                 
-                # Load recent metrics (last 24 hours)
-                cutoff_time = time.time() - 86400
-                for metric_data in data.get('metrics', []):
-                    if metric_data['timestamp'] > cutoff_time:
-                        metric = PerformanceMetric(**metric_data)
-                        self.metrics.append(metric)
-                        self._update_operation_stats(metric)
+                # Files written before the NDJSON log embed the metrics - migrated on the next save
+                legacy_records = data.get('metrics', [])
+                if legacy_records:
+                    metric_records.extend(legacy_records)
+                    self._metrics_log_needs_rewrite = True
                 
                 # Load thresholds
                 self.thresholds.update(data.get('thresholds', {}))
-                
-                print(f"[PerformanceMonitor] ✅ Loaded {len(self.metrics)} recent metrics")
+            
+            if os.path.exists(self.metrics_log_path):
+                with open(self.metrics_log_path, 'rb') as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        try:
+                            metric_records.append(_json_loads(line))
+                        except ValueError:
+                            # Torn or corrupt line (e.g. a crash mid-append) - dropped on the next save
+                            self._metrics_log_needs_rewrite = True
+                            continue
+                        self._logged_metric_count += 1
+                        if not line.endswith(b"\n"):
+                            # Appending would glue the next record onto this line
+                            self._metrics_log_needs_rewrite = True
+            
+            for metric_data in metric_records:
+                try:
+                    if metric_data['timestamp'] <= cutoff_time:
+                        continue
+                    metric = PerformanceMetric(**metric_data)
+                except (KeyError, TypeError):
+                    self._metrics_log_needs_rewrite = True
+                    continue
+                self.metrics.append(metric)
+                self._update_operation_stats(metric)
+            
+            if metric_records:
+                logger.info("[PerformanceMonitor] ✅ Loaded %d recent metrics", len(self.metrics))
                 
         except Exception as e:
-            print(f"[PerformanceMonitor] ⚠️ Failed to load metrics: {e}")
+            logger.warning("[PerformanceMonitor] ⚠️ Failed to load metrics: %s", e)
 
 # Context manager for easy operation tracking
 class PerformanceTimer:
@@ -292,7 +472,8 @@ class PerformanceTimer:
         self.start_time = None
     
     def __enter__(self):
-        self.operation_id = f"{self.operation_name}_{time.time()}"
+        # The timer's identity is unique while it is alive - no key string to build
+        self.operation_id = id(self)
         self.monitor.start_operation(self.operation_id)
         return self
     
@@ -309,4 +490,4 @@ def track_performance(operation_name: str, context: Dict[str, Any] = None):
     """Decorator or context manager for tracking performance"""
     return PerformanceTimer(performance_monitor, operation_name, context)
 
-print("[PerformanceMonitor] ✅ Performance monitoring system ready")
\ No newline at end of file
+logger.info("[PerformanceMonitor] ✅ Performance monitoring system ready")
\ No newline at end of file
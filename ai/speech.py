@@ -3,55 +3,207 @@ import asyncio
 import json
 import numpy as np
 import websockets
-from config import FASTER_WHISPER_WS, DEBUG
+from config import FASTER_WHISPER_WS, DEBUG, SAMPLE_RATE
 import re
 import os
+import threading
+import weakref
+import concurrent.futures
 from datetime import datetime
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+def _json_dumps(obj) -> bytes:
+    """Serialize to compact UTF-8 JSON bytes, using orjson when available"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+def _json_loads(data):
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+# Restrictive introduction patterns that require an explicit introduction, in one pass:
+# "My name is David", "Call me David", "You can call me David", "People call me David"
+# (the problematic "i'm\s+([a-zA-Z]+)" pattern is deliberately not included)
+_NAME_INTRODUCTION_RE = re.compile(r"(?:my\s+name\s+is|call\s+me)\s+([a-zA-Z]+)", re.IGNORECASE)
+
+# Common words that follow an introduction phrase but are not names
+_FALSE_POSITIVE_NAMES = frozenset({
+    'great', 'good', 'fine', 'okay', 'well', 'bad', 'tired', 'busy',
+    'ready', 'sorry', 'happy', 'sad', 'angry', 'excited', 'confused',
+    'here', 'there', 'home', 'work', 'back', 'away', 'done', 'going',
+    'doing', 'working', 'thinking', 'checking', 'testing', 'trying'
+})
+
+# Clips this short or this quiet (peak int16 amplitude, ~-50 dBFS) can't hold speech,
+# so they are answered locally instead of costing a Whisper round-trip
+_MIN_TRANSCRIBE_SAMPLES = SAMPLE_RATE // 10  # 100 ms
+_SILENCE_PEAK_AMPLITUDE = 100
+
+# Large utterances go out as one fragmented message, so each frame is masked and
+# written separately instead of copying the whole buffer for a single frame
+_AUDIO_FRAGMENT_BYTES = 64 * 1024
+
+class _WhisperConnection:
+    """Long-lived Whisper WebSocket, reused across utterances on one event loop"""
+    
+    def __init__(self):
+        self.ws = None
+        self.lock = asyncio.Lock()  # One utterance in flight per connection
+    
+    async def _connect(self):
+        if self.ws is None:
+            self.ws = await websockets.connect(
+                FASTER_WHISPER_WS, ping_interval=20, ping_timeout=20, max_size=None
+            )
+        return self.ws
+    
+    async def _discard(self):
+        ws, self.ws = self.ws, None
+        if ws is not None:
+            try:
+                await ws.close()
+            except Exception:
+                pass
+    
+    @staticmethod
+    async def _send_audio(ws, payload):
+        if len(payload) <= _AUDIO_FRAGMENT_BYTES:
+            await ws.send(payload)
+        else:
+            await ws.send(payload[start:start + _AUDIO_FRAGMENT_BYTES]
+                          for start in range(0, len(payload), _AUDIO_FRAGMENT_BYTES))
+    
+    async def transcribe(self, payload):
+        """Send one utterance and return the raw server reply"""
+        async with self.lock:
+            for attempt in range(2):
+                ws = await self._connect()
+                try:
+                    await self._send_audio(ws, payload)
+                    await ws.send("end")
+                    return await asyncio.wait_for(ws.recv(), timeout=15)
+                except (websockets.exceptions.ConnectionClosed, websockets.exceptions.InvalidState):
+                    # Server dropped the idle connection - reconnect once and resend
+                    await self._discard()
+                    if attempt:
+                        raise
+                except BaseException:
+                    # Timed out, cancelled (e.g. by _run_on_whisper_loop) or failed mid-send:
+                    # a late reply or half-sent frame would corrupt the next utterance
+                    await self._discard()
+                    raise
+
+# Connections (and their locks) belong to the loop that created them
+_whisper_connections = weakref.WeakKeyDictionary()
+
+def _get_whisper_connection() -> _WhisperConnection:
+    loop = asyncio.get_running_loop()
+    conn = _whisper_connections.get(loop)
+    if conn is None:
+        conn = _whisper_connections[loop] = _WhisperConnection()
+    return conn
+
+# Synchronous callers share one long-lived loop instead of building a new one per
+# utterance, which also keeps that loop's Whisper connection open between calls
+_whisper_loop = None
+_whisper_loop_lock = threading.Lock()
+
+def _get_whisper_loop() -> asyncio.AbstractEventLoop:
+    global _whisper_loop
+    if _whisper_loop is None:
+        with _whisper_loop_lock:
+            if _whisper_loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="WhisperLoop", daemon=True).start()
+                _whisper_loop = loop
+    return _whisper_loop
+
+def _run_on_whisper_loop(audio, timeout: float = 30):
+    """Run whisper_stt_async on the shared loop and wait for the transcription"""
+    future = asyncio.run_coroutine_threadsafe(whisper_stt_async(audio), _get_whisper_loop())
+    try:
+        return future.result(timeout=timeout)
+    except concurrent.futures.TimeoutError:
+        future.cancel()  # Don't leave it holding the connection
+        raise
+
 async def whisper_stt_async(audio):
     """Transcribe audio using Whisper WebSocket"""
     try:
         if audio.dtype != np.int16:
             if np.issubdtype(audio.dtype, np.floating):
-                audio = (audio * 32767).clip(-32768, 32767).astype(np.int16)
+                # Scale and clip in one float32 scratch buffer, then cast once
+                scaled = np.multiply(audio, 32767, dtype=np.float32)
+                np.clip(scaled, -32768, 32767, out=scaled)
+                audio = scaled.astype(np.int16)
             else:
                 audio = audio.astype(np.int16)
         
-        async with websockets.connect(FASTER_WHISPER_WS, ping_interval=None) as ws:
-            await ws.send(audio.tobytes())
-            await ws.send("end")
-            
-            try:
-                message = await asyncio.wait_for(ws.recv(), timeout=15)
-            except asyncio.TimeoutError:
-                print("[Buddy V2] Whisper timeout")
-                return ""
-            
+        # max/min instead of np.abs: no temporary array, and abs(-32768) overflows int16
+        if audio.size < _MIN_TRANSCRIBE_SAMPLES or max(int(audio.max()), -int(audio.min())) < _SILENCE_PEAK_AMPLITUDE:
+            if DEBUG:
+                print("[Buddy V2] 🔇 Skipping Whisper for silent/too-short audio")
+            return ""
+        
+        # websockets frames any bytes-like object, so send a view of the PCM buffer
+        # instead of copying it with tobytes()
+        payload = memoryview(np.ascontiguousarray(audio)).cast('B')
+        
+        try:
+            message = await _get_whisper_connection().transcribe(payload)
+        except asyncio.TimeoutError:
+            print("[Buddy V2] Whisper timeout")
+            return ""
+        
+        # Replies are normally a JSON object (parsed from bytes directly); anything
+        # else is the plain transcript, so don't pay for a failed parse on it
+        text = None
+        if message.lstrip()[:1] in ("{", b"{"):
             try:
-                data = json.loads(message)
-                text = data.get("text", "").strip()
-                if DEBUG:
-                    print(f"[Buddy V2] 📝 Whisper: '{text}'")
-                return text
-            except:
-                text = message.decode("utf-8") if isinstance(message, bytes) else message
-                if DEBUG:
-                    print(f"[Buddy V2] 📝 Whisper: '{text}'")
-                return text.strip()
-                
+                text = _json_loads(message).get("text", "")
+            except (ValueError, AttributeError):
+                pass
+        if not isinstance(text, str):
+            text = message.decode("utf-8") if isinstance(message, bytes) else message
+        
+        text = text.strip()
+        if DEBUG:
+            print(f"[Buddy V2] 📝 Whisper: '{text}'")
+        return text
+        
     except Exception as e:
         print(f"[Buddy V2] Whisper error: {e}")
         return ""
 
+# Shared ultra-intelligent name manager, created on first use (False if unavailable)
+_name_manager = None
+
+def _get_name_manager():
+    global _name_manager
+    if _name_manager is None:
+        try:
+            from voice.manager_names import UltraIntelligentNameManager
+        except ImportError:
+            _name_manager = False
+        else:
+            _name_manager = UltraIntelligentNameManager()
+    return _name_manager
+
 def extract_spoken_name(text: str, system_username: str) -> str:
     """Extract the user's actual spoken name using KoboldCPP intelligence"""
     
     try:
-        # Try to import the ultra-intelligent name manager
-        from voice.manager_names import UltraIntelligentNameManager
-        
-        # Create instance
-        name_manager = UltraIntelligentNameManager()
+        name_manager = _get_name_manager()
+        if name_manager is False:
+            print(f"[Speech] ⚠️ KoboldCPP name manager not available, using fallback")
+            return extract_spoken_name_fallback(text, system_username)
         
         # Use the smart extraction
         if name_manager.is_ultra_intelligent_spontaneous_introduction(text):
@@ -72,9 +224,6 @@ def extract_spoken_name(text: str, system_username: str) -> str:
             print(f"[Speech] 🛡️ Not an introduction: '{text}'")
             return None
             
-    except ImportError:
-        print(f"[Speech] ⚠️ KoboldCPP name manager not available, using fallback")
-        return extract_spoken_name_fallback(text, system_username)
     except Exception as e:
         print(f"[Speech] ❌ KoboldCPP error: {e}, using fallback")
         return extract_spoken_name_fallback(text, system_username)
@@ -82,23 +231,12 @@ def extract_spoken_name(text: str, system_username: str) -> str:
 def extract_spoken_name_fallback(text: str, system_username: str) -> str:
     """Fallback name extraction with better validation"""
     
-    # More restrictive patterns that require explicit introduction
-    name_patterns = [
-        r"my\s+name\s+is\s+([a-zA-Z]+)",      # "My name is David"
-        r"call\s+me\s+([a-zA-Z]+)",           # "Call me David"
-        r"you\s+can\s+call\s+me\s+([a-zA-Z]+)", # "You can call me David"
-        r"people\s+call\s+me\s+([a-zA-Z]+)",  # "People call me David"
-        # Removed the problematic "i'm\s+([a-zA-Z]+)" pattern
-    ]
-    
-    for pattern in name_patterns:
-        match = re.search(pattern, text.lower())
-        if match:
-            spoken_name = match.group(1).capitalize()
-            
-            # Additional validation
-            if is_valid_name_candidate(spoken_name, system_username):
-                return spoken_name
+    for match in _NAME_INTRODUCTION_RE.finditer(text):
+        spoken_name = match.group(1).capitalize()
+        
+        # Additional validation
+        if is_valid_name_candidate(spoken_name, system_username):
+            return spoken_name
     
     return None
 
@@ -108,29 +246,29 @@ def is_valid_name_candidate(name: str, system_username: str) -> bool:
     if not name or len(name) < 2:
         return False
     
+    name_lower = name.lower()
+    
     # Don't use system usernames as spoken names
-    if name.lower() == system_username.lower():
+    if name_lower == system_username.lower():
         return False
     
     # Block common false positives
-    false_positives = {
-        'great', 'good', 'fine', 'okay', 'well', 'bad', 'tired', 'busy',
-        'ready', 'sorry', 'happy', 'sad', 'angry', 'excited', 'confused',
-        'here', 'there', 'home', 'work', 'back', 'away', 'done', 'going',
-        'doing', 'working', 'thinking', 'checking', 'testing', 'trying'
-    }
-    
-    if name.lower() in false_positives:
+    if name_lower in _FALSE_POSITIVE_NAMES:
         print(f"[Speech] 🛡️ Blocked false positive: {name}")
         return False
     
     return True
 
+# Spoken names by system username, with the identity file's mtime when it was read
+_identity_cache = {}
+
 def set_primary_identity(system_username: str, spoken_name: str):
     """Map system username to spoken name"""
     
-    identity_file = f"memory/{system_username}/primary_identity.json"
-    os.makedirs(f"memory/{system_username}", exist_ok=True)
+    user_dir = f"memory/{system_username}"
+    identity_file = f"{user_dir}/primary_identity.json"
+    if not os.path.isdir(user_dir):
+        os.makedirs(user_dir, exist_ok=True)
     
     identity_data = {
         "system_username": system_username,
@@ -139,8 +277,19 @@ def set_primary_identity(system_username: str, spoken_name: str):
         "created_date": datetime.now().isoformat()
     }
     
-    with open(identity_file, 'w') as f:
-        json.dump(identity_data, f, indent=2)
+    # Atomic file write: write to a per-thread temp file first, then swap it in (compact - machine-read)
+    temp_path = f"{identity_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temp_path, 'wb') as temp_file:
+            temp_file.write(_json_dumps(identity_data))
+        os.replace(temp_path, identity_file)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+    _identity_cache.pop(system_username, None)
     
     print(f"[Identity] Set primary identity: {system_username} → {spoken_name}")
 
@@ -149,12 +298,21 @@ def get_display_name(system_username: str) -> str:
     
     identity_file = f"memory/{system_username}/primary_identity.json"
     
-    if os.path.exists(identity_file):
-        with open(identity_file, 'r') as f:
-            identity = json.load(f)
-            return identity.get("spoken_name", system_username)
+    try:
+        # One stat both checks the file exists and validates the cache
+        mtime = os.stat(identity_file).st_mtime_ns
+    except FileNotFoundError:
+        return system_username
     
-    return system_username
+    cached = _identity_cache.get(system_username)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    
+    with open(identity_file, 'rb') as f:
+        identity = _json_loads(f.read())
+    spoken_name = identity.get("spoken_name", system_username)
+    _identity_cache[system_username] = (mtime, spoken_name)
+    return spoken_name
 
 def identify_user(spoken_input: str, system_username: str) -> str:
     """Identify user and prevent duplicates with enhanced intelligence"""
@@ -177,27 +335,9 @@ def identify_user(spoken_input: str, system_username: str) -> str:
 def transcribe_audio(audio):
     """Synchronous wrapper for Whisper STT with proper event loop handling"""
     try:
-        # ✅ FIXED: Better event loop detection and handling
-        current_loop = None
-        loop_is_running = False
-        
-        try:
-            # Try to get the current running loop (Python 3.7+)
-            current_loop = asyncio.get_running_loop()
-            loop_is_running = True
-        except RuntimeError:
-            # No running loop, which is fine
-            pass
-        
-        if loop_is_running:
-            # Running in an async context, use thread executor to avoid conflicts
-            import concurrent.futures
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                future = executor.submit(lambda: asyncio.run(whisper_stt_async(audio)))
-                return future.result(timeout=30)  # 30 second timeout for safety
-        else:
-            # No running loop, safe to use asyncio.run
-            return asyncio.run(whisper_stt_async(audio))
+        # The shared Whisper loop has its own thread, so this works the same whether or
+        # not the caller is inside a running event loop - no second loop is built either way
+        return _run_on_whisper_loop(audio)
             
     except Exception as e:
         print(f"[Speech] ❌ Async event loop error: {e}")
@@ -205,6 +345,10 @@ def transcribe_audio(audio):
         # Fallback to sync processing if async fails
         return _transcribe_audio_fallback(audio)
 
+async def transcribe_audio_async(audio):
+    """Transcribe audio from async code without blocking the caller's event loop"""
+    return await whisper_stt_async(audio)
+
 def _transcribe_audio_fallback(audio):
     """Fallback transcription method when async fails"""
     print("[Speech] ⚠️ Using fallback transcription method")
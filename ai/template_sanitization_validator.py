@@ -11,10 +11,16 @@ Key Features:
 """
 
 import re
+import os
 import json
 import time
+import queue
+import atexit
+import threading
 import hashlib
-from typing import Dict, List, Any, Optional, Tuple, Set
+import functools
+from collections import Counter
+from typing import Dict, List, Any, Optional, Tuple, Set, FrozenSet
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
@@ -28,6 +34,69 @@ class ValidationResult:
     sanitized_content: str
     validation_metadata: Dict[str, Any]
 
+# Results and log entries carry second-resolution local ISO timestamps - format each second once
+_iso_stamp_cache = (None, None)
+
+def _iso_now() -> str:
+    """Return the local ISO-8601 timestamp for the current second"""
+    global _iso_stamp_cache
+    second = int(time.time())
+    cached_second, stamp = _iso_stamp_cache
+    if cached_second != second:
+        stamp = datetime.fromtimestamp(second).isoformat()
+        _iso_stamp_cache = (second, stamp)
+    return stamp
+
+# Tokenizer and stop words for keyword extraction
+_WORD_RE = re.compile(r'\b\w+\b')
+
+_STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with',
+    'by', 'from', 'up', 'about', 'into', 'through', 'during', 'before', 'after',
+    'above', 'below', 'up', 'down', 'out', 'off', 'over', 'under', 'again', 'further',
+    'then', 'once', 'here', 'there', 'when', 'where', 'why', 'how', 'all', 'any',
+    'both', 'each', 'few', 'more', 'most', 'other', 'some', 'such', 'no', 'nor',
+    'not', 'only', 'own', 'same', 'so', 'than', 'too', 'very', 'can', 'will',
+    'just', 'don', 'should', 'now', 'i', 'me', 'my', 'myself', 'we', 'our', 'ours',
+    'ourselves', 'you', 'your', 'yours', 'yourself', 'yourselves', 'he', 'him', 'his',
+    'himself', 'she', 'her', 'hers', 'herself', 'it', 'its', 'itself', 'they', 'them',
+    'their', 'theirs', 'themselves', 'what', 'which', 'who', 'whom', 'this', 'that',
+    'these', 'those', 'am', 'is', 'are', 'was', 'were', 'be', 'been', 'being',
+    'have', 'has', 'had', 'having', 'do', 'does', 'did', 'doing', 'would', 'could',
+    'should', 'may', 'might', 'must', 'shall', 'will', 'user', 'said', 'mentioned'
+})
+
+# Sanitization cleanup: collapse whitespace, then drop removal markers
+_WHITESPACE_RE = re.compile(r'\s+')
+_REMOVED_MARKER_RE = re.compile(r'\[REMOVED\]\s*')
+
+# Factual claims: sentences that don't open with hedging language
+_SENTENCE_SPLIT_RE = re.compile(r'[.!?]+')
+_HEDGE_PREFIXES = ('i think', 'maybe', 'perhaps')
+
+# Claim comparison only drops the most common function words
+_CLAIM_STOP_WORDS = frozenset({'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with'})
+
+# Keyword extraction is memoized: one validation extracts keywords from the same
+# conversation text several times (relevance, similarity, off-topic checks)
+@functools.lru_cache(maxsize=1024)
+def _extract_relevance_keywords(text: str) -> FrozenSet[str]:
+    """Extract meaningful keywords from text"""
+    if not text:
+        return frozenset()
+    
+    # Simple keyword extraction (could be enhanced with NLP libraries)
+    words = _WORD_RE.findall(text.lower())
+    
+    # Filter out common stop words
+    return frozenset(word for word in words if len(word) > 2 and word not in _STOP_WORDS)
+
+@functools.lru_cache(maxsize=1024)
+def _extract_claim_keywords(text: str) -> FrozenSet[str]:
+    """Extract claim keywords (lighter stop-word list than relevance keywords)"""
+    words = _WORD_RE.findall(text.lower())
+    return frozenset(word for word in words if len(word) > 2 and word not in _CLAIM_STOP_WORDS)
+
 class TemplatePatternDetector:
     """Detects template patterns and example data contamination"""
     
@@ -72,28 +141,53 @@ class TemplatePatternDetector:
             ]
         }
         
+        # Weight for different pattern categories
+        self.pattern_weights = {
+            'restaurant_examples': 2.0,  # High weight for specific examples
+            'person_examples': 2.0,      # High weight for example names
+            'template_phrases': 1.0,     # Medium weight for template language
+            'generic_memories': 1.5      # Higher weight for generic patterns
+        }
+        
         # Compile regex patterns for efficiency
         self.compiled_patterns = {}
         for category, patterns in self.template_patterns.items():
             self.compiled_patterns[category] = [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
         
+        # All patterns as one alternation - a single scan tells whether any of them occurs
+        self.combined_pattern = re.compile(
+            '|'.join(f'(?:{pattern})' for patterns in self.template_patterns.values() for pattern in patterns),
+            re.IGNORECASE
+        )
+        
         print("[TemplatePatternDetector] 🔍 Template pattern detector initialized")
         print(f"[TemplatePatternDetector] 📋 Monitoring {sum(len(p) for p in self.template_patterns.values())} template patterns")
     
     def detect_template_contamination(self, content: str) -> Dict[str, Any]:
         """Detect template contamination in content"""
+        if not self.combined_pattern.search(content):
+            # Clean content (the common case) - skip the per-pattern scans
+            return {
+                'contamination_score': 0.0,
+                'detected_patterns': [],
+                'pattern_counts': {},
+                'is_contaminated': False,
+                'confidence': 1.0
+            }
+        
         contamination_score = 0
         detected_patterns = []
         pattern_counts = {}
         
         for category, patterns in self.compiled_patterns.items():
             category_matches = 0
+            weight = self.pattern_weights.get(category, 1.0)
             for pattern in patterns:
                 matches = pattern.findall(content)
                 if matches:
                     category_matches += len(matches)
                     detected_patterns.extend(matches)
-                    contamination_score += len(matches) * self._get_pattern_weight(category)
+                    contamination_score += len(matches) * weight
             
             if category_matches > 0:
                 pattern_counts[category] = category_matches
@@ -109,16 +203,6 @@ class TemplatePatternDetector:
             'is_contaminated': normalized_score > 0.3,  # Threshold for contamination
             'confidence': 1.0 - normalized_score
         }
-    
-    def _get_pattern_weight(self, category: str) -> float:
-        """Get weight for different pattern categories"""
-        weights = {
-            'restaurant_examples': 2.0,  # High weight for specific examples
-            'person_examples': 2.0,      # High weight for example names
-            'template_phrases': 1.0,     # Medium weight for template language
-            'generic_memories': 1.5      # Higher weight for generic patterns
-        }
-        return weights.get(category, 1.0)
 
 class ContentRelevanceValidator:
     """Validates that extracted content actually relates to the conversation"""
@@ -142,7 +226,8 @@ class ContentRelevanceValidator:
         content_keywords = self._extract_keywords(extracted_content)
         
         # Calculate relevance metrics
-        keyword_overlap = len(content_keywords.intersection(all_conversation_keywords))
+        shared_keywords = content_keywords.intersection(all_conversation_keywords)
+        keyword_overlap = len(shared_keywords)
         total_content_keywords = len(content_keywords)
         total_conversation_keywords = len(all_conversation_keywords)
         
@@ -167,39 +252,15 @@ class ContentRelevanceValidator:
             'semantic_relevance': semantic_relevance,
             'keyword_overlap': keyword_overlap,
             'total_content_keywords': total_content_keywords,
-            'shared_keywords': list(content_keywords.intersection(all_conversation_keywords)),
+            'shared_keywords': list(shared_keywords),
             'is_relevant': relevance_score >= self.relevance_threshold and not off_topic_indicators,
             'off_topic_indicators': off_topic_indicators,
             'confidence': min(relevance_score * 1.2, 1.0)  # Slight confidence boost
         }
     
-    def _extract_keywords(self, text: str) -> Set[str]:
+    def _extract_keywords(self, text: str) -> FrozenSet[str]:
         """Extract meaningful keywords from text"""
-        if not text:
-            return set()
-        
-        # Simple keyword extraction (could be enhanced with NLP libraries)
-        words = re.findall(r'\b\w+\b', text.lower())
-        
-        # Filter out common stop words
-        stop_words = {
-            'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with',
-            'by', 'from', 'up', 'about', 'into', 'through', 'during', 'before', 'after',
-            'above', 'below', 'up', 'down', 'out', 'off', 'over', 'under', 'again', 'further',
-            'then', 'once', 'here', 'there', 'when', 'where', 'why', 'how', 'all', 'any',
-            'both', 'each', 'few', 'more', 'most', 'other', 'some', 'such', 'no', 'nor',
-            'not', 'only', 'own', 'same', 'so', 'than', 'too', 'very', 'can', 'will',
-            'just', 'don', 'should', 'now', 'i', 'me', 'my', 'myself', 'we', 'our', 'ours',
-            'ourselves', 'you', 'your', 'yours', 'yourself', 'yourselves', 'he', 'him', 'his',
-            'himself', 'she', 'her', 'hers', 'herself', 'it', 'its', 'itself', 'they', 'them',
-            'their', 'theirs', 'themselves', 'what', 'which', 'who', 'whom', 'this', 'that',
-            'these', 'those', 'am', 'is', 'are', 'was', 'were', 'be', 'been', 'being',
-            'have', 'has', 'had', 'having', 'do', 'does', 'did', 'doing', 'would', 'could',
-            'should', 'may', 'might', 'must', 'shall', 'will', 'user', 'said', 'mentioned'
-        }
-        
-        meaningful_words = {word for word in words if len(word) > 2 and word not in stop_words}
-        return meaningful_words
+        return _extract_relevance_keywords(text)
     
     def _calculate_semantic_similarity(self, text1: str, text2: str) -> float:
         """Calculate semantic similarity between two texts (simplified)"""
@@ -222,7 +283,6 @@ class ContentRelevanceValidator:
         
         # Check for completely unrelated topics
         content_lower = extracted_content.lower()
-        conversation_lower = conversation_text.lower()
         
         # Common off-topic indicators
         off_topic_patterns = [
@@ -331,12 +391,12 @@ class MemoryContentValidator:
     def _extract_factual_claims(self, text: str) -> List[str]:
         """Extract factual claims from text"""
         # Simple claim extraction - could be enhanced with NLP
-        sentences = re.split(r'[.!?]', text)
+        sentences = _SENTENCE_SPLIT_RE.split(text)
         claims = []
         
         for sentence in sentences:
             sentence = sentence.strip()
-            if len(sentence) > 10 and not sentence.lower().startswith(('i think', 'maybe', 'perhaps')):
+            if len(sentence) > 10 and not sentence.lower().startswith(_HEDGE_PREFIXES):
                 claims.append(sentence)
         
         return claims
@@ -352,11 +412,9 @@ class MemoryContentValidator:
         
         return overlap / min_keywords >= 0.5 if min_keywords > 0 else False
     
-    def _extract_keywords(self, text: str) -> Set[str]:
+    def _extract_keywords(self, text: str) -> FrozenSet[str]:
         """Extract keywords (reuse from ContentRelevanceValidator)"""
-        words = re.findall(r'\b\w+\b', text.lower())
-        stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with'}
-        return {word for word in words if len(word) > 2 and word not in stop_words}
+        return _extract_claim_keywords(text)
     
     def _check_uncertainty_language(self, memory_content: str, source_text: str) -> float:
         """Check if uncertainty language is appropriate"""
@@ -388,9 +446,39 @@ class TemplateSanitizationValidator:
         self.relevance_validator = ContentRelevanceValidator()
         self.memory_validator = MemoryContentValidator()
         self.validation_log = []
+        self.max_log_entries = 1000
+        
+        # Running totals over the retained log, so statistics never rescan it;
+        # _log_issue_types holds each entry's parsed issue types, aligned with validation_log
+        self._log_issue_types: List[List[str]] = []
+        self._valid_count = 0
+        self._confidence_sum = 0.0
+        self._issue_counts: Counter = Counter()
+        
+        # Entries are appended to an NDJSON log (one line per validation) instead of
+        # rewriting the whole JSON list; storage_path is only read for older logs
+        self.log_path = os.path.splitext(storage_path)[0] + ".ndjson"
+        self._logged_entry_count = 0
+        self._log_needs_rewrite = False
+        
+        # Disk writes happen on a background thread, so validation never waits on I/O;
+        # entries are dropped from the file (not from memory) if the queue ever fills
+        self.log_write_interval = 0.1
+        self._log_queue: queue.Queue = queue.Queue(maxsize=10000)
+        self._log_pending = threading.Event()
+        self._log_write_lock = threading.Lock()
+        # Held (briefly, never across I/O) while an entry is appended and queued, so a
+        # compaction snapshot never contains an entry that is still waiting in the queue
+        self._log_append_lock = threading.Lock()
         
         self._load_validation_log()
         
+        self._log_thread = threading.Thread(
+            target=self._log_writer, daemon=True, name="TemplateValidationLog"
+        )
+        self._log_thread.start()
+        atexit.register(self.flush_validation_log)
+        
         print("[TemplateSanitizationValidator] 🔧 Template Sanitization & Validation System initialized")
     
     def validate_and_sanitize(self, content: str, conversation_text: str, 
@@ -401,10 +489,14 @@ class TemplateSanitizationValidator:
         # Step 1: Detect template contamination
         contamination_result = self.pattern_detector.detect_template_contamination(content)
         
-        # Step 2: Validate content relevance
-        relevance_result = self.relevance_validator.validate_relevance(
-            content, conversation_text, conversation_context
-        )
+        # Step 2: Validate content relevance (a template sanitized on its own has no
+        # conversation to be relevant to - the check could only ever fail)
+        if content_type == "template" and not conversation_text and not conversation_context:
+            relevance_result = self._relevance_not_applicable()
+        else:
+            relevance_result = self.relevance_validator.validate_relevance(
+                content, conversation_text, conversation_context
+            )
         
         # Step 3: Validate memory content (if applicable)
         memory_validation = {}
@@ -444,7 +536,7 @@ class TemplateSanitizationValidator:
                 'relevance_result': relevance_result,
                 'memory_validation': memory_validation,
                 'processing_time': time.time() - start_time,
-                'timestamp': datetime.now().isoformat()
+                'timestamp': _iso_now()
             }
         )
         
@@ -453,18 +545,31 @@ class TemplateSanitizationValidator:
         
         return result
     
+    def _relevance_not_applicable(self) -> Dict[str, Any]:
+        """Relevance result for content validated without any conversation"""
+        return {
+            'relevance_score': 1.0,
+            'keyword_relevance': 1.0,
+            'semantic_relevance': 1.0,
+            'keyword_overlap': 0,
+            'total_content_keywords': 0,
+            'shared_keywords': [],
+            'is_relevant': True,
+            'off_topic_indicators': [],
+            'confidence': 1.0
+        }
+    
     def _sanitize_content(self, content: str, contamination_result: Dict[str, Any]) -> str:
         """Sanitize content by removing template patterns"""
-        sanitized = content
-        
-        # Remove detected template patterns
-        for category, patterns in self.pattern_detector.compiled_patterns.items():
-            for pattern in patterns:
-                sanitized = pattern.sub('[REMOVED]', sanitized)
+        if contamination_result['detected_patterns']:
+            # Remove detected template patterns in one pass over the content
+            sanitized = self.pattern_detector.combined_pattern.sub('[REMOVED]', content)
+        else:
+            sanitized = content  # Detection already found nothing to remove
         
         # Clean up multiple spaces and empty brackets
-        sanitized = re.sub(r'\s+', ' ', sanitized)
-        sanitized = re.sub(r'\[REMOVED\]\s*', '', sanitized)
+        sanitized = _WHITESPACE_RE.sub(' ', sanitized)
+        sanitized = _REMOVED_MARKER_RE.sub('', sanitized)
         sanitized = sanitized.strip()
         
         return sanitized
@@ -484,37 +589,144 @@ class TemplateSanitizationValidator:
     def _log_validation(self, content: str, result: ValidationResult):
         """Log validation results for analysis"""
         log_entry = {
-            'timestamp': datetime.now().isoformat(),
-            'content_hash': hashlib.md5(content.encode()).hexdigest(),
+            'timestamp': _iso_now(),
+            'content_hash': hashlib.blake2b(content.encode(), digest_size=8).hexdigest(),  # Identifier only
             'is_valid': result.is_valid,
             'confidence_score': result.confidence_score,
             'issues_count': len(result.issues_found),
             'issues': result.issues_found
         }
         
-        self.validation_log.append(log_entry)
-        
-        # Keep only last 1000 entries
-        if len(self.validation_log) > 1000:
-            self.validation_log = self.validation_log[-1000:]
-        
-        self._save_validation_log()
+        with self._log_append_lock:
+            self._count_log_entry(log_entry)
+            self.validation_log.append(log_entry)
+            
+            # Keep only last 1000 entries
+            self._trim_validation_log()
+            
+            try:
+                self._log_queue.put_nowait(log_entry)
+                self._log_pending.set()
+            except queue.Full:
+                pass
+    
+    def _count_log_entry(self, entry: Dict[str, Any]):
+        """Add an entry to the running statistics (unchanged if the entry is malformed)"""
+        issue_types = [issue.split('(')[0].strip() for issue in entry['issues']]  # Extract issue type
+        is_valid = bool(entry['is_valid'])
+        confidence_score = float(entry['confidence_score'])
+        
+        self._log_issue_types.append(issue_types)
+        self._valid_count += is_valid
+        self._confidence_sum += confidence_score
+        self._issue_counts.update(issue_types)
+    
+    def _trim_validation_log(self):
+        """Drop the oldest entries beyond max_log_entries from the log and its statistics"""
+        excess = len(self.validation_log) - self.max_log_entries
+        if excess <= 0:
+            return
+        
+        for entry, issue_types in zip(self.validation_log[:excess], self._log_issue_types[:excess]):
+            self._valid_count -= bool(entry['is_valid'])
+            self._confidence_sum -= entry['confidence_score']
+            for issue_type in issue_types:
+                self._issue_counts[issue_type] -= 1
+                if not self._issue_counts[issue_type]:
+                    del self._issue_counts[issue_type]
+        
+        del self.validation_log[:excess]
+        del self._log_issue_types[:excess]
     
     def _load_validation_log(self):
         """Load validation log from disk"""
+        loaded = []
         try:
-            if Path(self.storage_path).exists():
+            if Path(self.log_path).exists():
+                with open(self.log_path, 'r') as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        try:
+                            loaded.append(json.loads(line))
+                        except ValueError:
+                            # Torn or corrupt line (e.g. a crash mid-append) - dropped on the next write
+                            self._log_needs_rewrite = True
+                            continue
+                        self._logged_entry_count += 1
+                        if not line.endswith("\n"):
+                            # Appending would glue the next entry onto this line
+                            self._log_needs_rewrite = True
+            elif Path(self.storage_path).exists():
+                # Log written before the NDJSON format - migrated on the next write
                 with open(self.storage_path, 'r') as f:
-                    self.validation_log = json.load(f)
-                print(f"[TemplateSanitizationValidator] 📚 Loaded {len(self.validation_log)} validation log entries")
+                    loaded = json.load(f)
+                self._log_needs_rewrite = True
         except Exception as e:
             print(f"[TemplateSanitizationValidator] ⚠️ Could not load validation log: {e}")
+        
+        # Keep only entries the statistics can count, so the log and the totals stay aligned
+        for entry in loaded[-self.max_log_entries:]:
+            try:
+                self._count_log_entry(entry)
+            except (KeyError, TypeError, ValueError, AttributeError):
+                self._log_needs_rewrite = True
+                continue
+            self.validation_log.append(entry)
+        
+        if self.validation_log:
+            print(f"[TemplateSanitizationValidator] 📚 Loaded {len(self.validation_log)} validation log entries")
+    
+    def _log_writer(self):
+        """Append queued log entries to disk in batches"""
+        while True:
+            # Entries only leave the queue under the write lock, so a compaction
+            # from flush_validation_log can never race with one held here
+            self._log_pending.wait()
+            time.sleep(self.log_write_interval)  # Let a burst accumulate
+            self._log_pending.clear()
+            self._write_log_entries([])
+    
+    def flush_validation_log(self):
+        """Write any queued log entries now"""
+        self._write_log_entries([])
+    
+    def _write_log_entries(self, pending: List[Dict[str, Any]]):
+        """Drain the log queue and append everything to the log file"""
+        with self._log_write_lock:
+            with self._log_append_lock:
+                while True:
+                    try:
+                        pending.append(self._log_queue.get_nowait())
+                    except queue.Empty:
+                        break
+                
+                if not pending:
+                    return
+                
+                compact = self._log_needs_rewrite or self._logged_entry_count + len(pending) > 2 * self.max_log_entries
+                # Every entry in this snapshot has left the queue, so none is written twice
+                retained = list(self.validation_log) if compact else None
+            
+            if compact:
+                # Compact: rewrite the log with just the entries still retained
+                self._save_validation_log(retained)
+                return
+            
+            try:
+                with open(self.log_path, 'a') as f:
+                    f.writelines(json.dumps(entry) + "\n" for entry in pending)
+                self._logged_entry_count += len(pending)
+            except Exception as e:
+                print(f"[TemplateSanitizationValidator] ❌ Could not save validation log: {e}")
     
-    def _save_validation_log(self):
-        """Save validation log to disk"""
+    def _save_validation_log(self, entries: List[Dict[str, Any]]):
+        """Rewrite the validation log on disk with just the given entries"""
         try:
-            with open(self.storage_path, 'w') as f:
-                json.dump(self.validation_log, f, indent=2)
+            with open(self.log_path, 'w') as f:
+                f.writelines(json.dumps(entry) + "\n" for entry in entries)
+            self._logged_entry_count = len(entries)
+            self._log_needs_rewrite = False
         except Exception as e:
             print(f"[TemplateSanitizationValidator] ❌ Could not save validation log: {e}")
     
@@ -524,17 +736,13 @@ class TemplateSanitizationValidator:
             return {}
         
         total_validations = len(self.validation_log)
-        valid_count = sum(1 for entry in self.validation_log if entry['is_valid'])
+        valid_count = self._valid_count
         
         # Calculate average scores and common issues
-        avg_confidence = sum(entry['confidence_score'] for entry in self.validation_log) / total_validations
+        avg_confidence = self._confidence_sum / total_validations
         
         # Common issues
-        issue_counts = {}
-        for entry in self.validation_log:
-            for issue in entry['issues']:
-                issue_type = issue.split('(')[0].strip()  # Extract issue type
-                issue_counts[issue_type] = issue_counts.get(issue_type, 0) + 1
+        issue_counts = dict(self._issue_counts)
         
         return {
             'total_validations': total_validations,
@@ -85,7 +85,8 @@ def extract_all_from_text(username: str, text: str, conversation_context: str =
         cache_key = f"extract_{username}_{hash(text + conversation_context)}"
         cached_result = get_cached_memory_intelligent(
             cache_key, 
-            context_tags={username, interaction_type, "extraction"}
+            context_tags={username, interaction_type, "extraction"},
+            primary_context=username
         )
         
         if cached_result:
@@ -240,6 +240,22 @@ def test_template_sanitization_validator():
         print(f"  Sanitized: {sanitized}")
         print(f"  Sanitization: {'✅ CLEANED' if len(sanitized) < len(template_content) else '❌ NO CHANGE'}")
         
+        # Overlapping patterns are removed as one match (the longest alternative wins)
+        overlap_content = "I had french fries from McDonald's yesterday"
+        overlap_sanitized = sanitize_template_content(overlap_content)
+        print(f"  Overlapping patterns: {overlap_sanitized!r}")
+        if overlap_sanitized != "I had yesterday":
+            print("  ❌ Overlapping template patterns were not removed as one match")
+            return False
+        
+        # Clean content is left as-is (apart from whitespace normalization)
+        clean_template = "User enjoys hiking  on weekends "
+        clean_sanitized = sanitize_template_content(clean_template)
+        print(f"  Clean content: {clean_sanitized!r}")
+        if clean_sanitized != "User enjoys hiking on weekends":
+            print("  ❌ Clean content was changed by sanitization")
+            return False
+        
         # Test 4: Memory content validation
         print("\n📋 Test 4: Memory content validation")
         
@@ -273,6 +289,121 @@ def test_template_sanitization_validator():
         traceback.print_exc()
         return False
 
+def test_template_validation_log_persistence():
+    """Test loading and compacting the template validation log"""
+    print("\n" + "="*80)
+    print("🧪 Testing Template Validation Log Persistence")
+    print("="*80)
+    
+    try:
+        import json
+        import tempfile
+        from ai.template_sanitization_validator import TemplateSanitizationValidator
+        
+        def log_entry(index, is_valid=True):
+            return {
+                'timestamp': f"2025-01-08T00:00:{index:02d}",
+                'content_hash': f"hash{index}",
+                'is_valid': is_valid,
+                'confidence_score': 0.9,
+                'issues_count': 1,
+                'issues': ["Template contamination detected (score: 0.50)"]
+            }
+        
+        def statistics_match_log(validator):
+            stats = validator.get_validation_statistics()
+            entries = validator.validation_log
+            issue_counts = {}
+            for entry in entries:
+                for issue in entry['issues']:
+                    issue_type = issue.split('(')[0].strip()
+                    issue_counts[issue_type] = issue_counts.get(issue_type, 0) + 1
+            return (stats['total_validations'] == len(entries) and
+                    stats['valid_count'] == sum(1 for entry in entries if entry['is_valid']) and
+                    stats['common_issues'] == issue_counts)
+        
+        # Test 1: Torn and malformed lines are skipped, and the file is repaired
+        print("\n📋 Test 1: Torn log lines")
+        
+        storage_path = os.path.join(tempfile.mkdtemp(), "validation_log.json")
+        log_path = os.path.splitext(storage_path)[0] + ".ndjson"
+        with open(log_path, 'w') as f:
+            for index in range(5):
+                f.write(json.dumps(log_entry(index)) + "\n")
+            f.write(json.dumps({'timestamp': "missing fields"}) + "\n")
+            f.write('{"timestamp": "x", "is_va')  # Crash mid-append
+        
+        validator = TemplateSanitizationValidator(storage_path=storage_path)
+        loaded = len(validator.validation_log)
+        stats = validator.get_validation_statistics()
+        print(f"  Loaded entries: {loaded}, valid: {stats['valid_count']}")
+        if loaded != 5 or not statistics_match_log(validator):
+            print("  ❌ Torn log was not loaded up to the damage")
+            return False
+        
+        validator.validate_and_sanitize("hello world", "hello there world")
+        validator.flush_validation_log()
+        with open(log_path) as f:
+            lines = [json.loads(line) for line in f]  # Raises if a line is still torn
+        reloaded = TemplateSanitizationValidator(storage_path=storage_path)
+        print(f"  Log lines after repair: {len(lines)}, reloaded: {len(reloaded.validation_log)}")
+        if len(lines) != 6 or len(reloaded.validation_log) != 6:
+            print("  ❌ Torn log was not repaired on the next write")
+            return False
+        
+        # Test 2: Statistics follow the retained window through trimming
+        print("\n📋 Test 2: Statistics over the retained window")
+        
+        validator.max_log_entries = 4
+        for index in range(6):
+            validator.validate_and_sanitize(f"thing {index}", "thing")
+        if not statistics_match_log(validator):
+            print("  ❌ Statistics drifted from the retained log")
+            return False
+        print(f"  Statistics match the {len(validator.validation_log)} retained entries")
+        
+        # Test 3: Compaction racing concurrent validations writes no duplicates
+        print("\n📋 Test 3: Concurrent compaction")
+        
+        storage_path = os.path.join(tempfile.mkdtemp(), "validation_log.json")
+        log_path = os.path.splitext(storage_path)[0] + ".ndjson"
+        validator = TemplateSanitizationValidator(storage_path=storage_path)
+        validator.max_log_entries = 15
+        validator.log_write_interval = 0.001
+        
+        def validate_many(worker):
+            for index in range(200):
+                validator.validate_and_sanitize(f"thing {worker} {index}", "thing")
+        
+        def flush_many():
+            for _ in range(300):
+                validator.flush_validation_log()
+        
+        threads = [threading.Thread(target=validate_many, args=(worker,)) for worker in range(4)]
+        threads.append(threading.Thread(target=flush_many))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        validator.flush_validation_log()
+        
+        with open(log_path) as f:
+            lines = [json.loads(line) for line in f]
+        hashes = [entry['content_hash'] for entry in lines]
+        print(f"  Log lines: {len(lines)}, unique: {len(set(hashes))}")
+        if len(hashes) != len(set(hashes)) or lines[-15:] != validator.validation_log:
+            print("  ❌ Compaction wrote duplicate or missing entries")
+            return False
+        
+        print("✅ Template Validation Log Persistence tests completed successfully")
+        return True
+    
+    except Exception as e:
+        print(f"❌ Template Validation Log Persistence test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
 def test_performance_optimizer():
     """Test the Performance Optimizer"""
     print("\n" + "="*80)
@@ -607,6 +738,7 @@ def main():
         ("Memory Profile Continuity Manager", test_memory_profile_continuity_manager),
         ("Enhanced Extraction Coordinator", test_extraction_coordinator),
         ("Template Sanitization & Validation", test_template_sanitization_validator),
+        ("Template Validation Log Persistence", test_template_validation_log_persistence),
         ("Performance Optimizer", test_performance_optimizer),
         ("Integration Scenario", test_integration_scenario),
         ("Performance Benchmarks", test_performance_benchmarks)